@@ -1,6 +1,8 @@
 import math
+from types import MappingProxyType
 from typing import Optional, Dict, Any, Union
 import numpy as np
+import pytest
 
 from vivarium.core.process import (
     Process, Deriver, Step)
@@ -356,7 +358,7 @@ class Sine(Process):
     def next_update(self, timestep, states):
         phase_shift = timestep * states['frequency'] % 1.0
         signal = states['amplitude'] * math.sin(
-            2 * math.pi * (states['phase'] + phase_shift))
+            math.tau * (states['phase'] + phase_shift))
 
         return {
             'phase': phase_shift,
@@ -842,6 +844,28 @@ def test_composite_merge() -> None:
         assert key in composite['processes']
         assert isinstance(composite['processes'][key], ToyProcess)
 
+    # a step cannot be merged where a process already is
+    with pytest.raises(ValueError):
+        composite.merge(steps={'process3': ToyProcess()})
+
+    # conflicts already in the composite are found by later merges
+    composite = composer.generate()
+    composite['steps']['process1'] = ToyProcess()
+    with pytest.raises(ValueError):
+        composite.merge(processes={'process4': ToyProcess()})
+
+    # step subtrees may be any mapping, not just dicts
+    composite = Composite({
+        'processes': {'agents': {'a': ToyProcess()}},
+        'topology': {'agents': {'a': {
+            'port1': ('store_A',), 'port2': ('store_B',)}}},
+    })
+    composite.merge(
+        steps={'agents': MappingProxyType({'b': ToyProcess()})},
+        topology={'agents': {'b': {
+            'port1': ('store_A',), 'port2': ('store_B',)}}})
+    assert set(composite['steps']['agents']) == {'b'}
+
 
 def test_get_composite() -> None:
     process1 = ToyProcess({'name': 'process1'})
@@ -931,6 +955,11 @@ class ToyDividerProcess(Process):
         super().__init__(parameters)
         self.agent_id = self.parameters['agent_id']
         self.composer = self.parameters['composer']
+        self.x_growth = self.parameters['x_growth']
+        self.x_division_threshold = self.parameters['x_division_threshold']
+        self.daughter_ids = [
+            str(self.agent_id) + '0',
+            str(self.agent_id) + '1']
 
     def ports_schema(self):
         return {
@@ -948,19 +977,16 @@ class ToyDividerProcess(Process):
 
     def next_update(self, timestep, states):
         x = states['variable']['x']
-        if x > self.parameters['x_division_threshold']:
-            daughter_ids = [
-                str(self.agent_id) + '0',
-                str(self.agent_id) + '1']
+        if x > self.x_division_threshold:
             divide_update = get_divide_update(
                 self.composer,
                 self.agent_id,
-                daughter_ids,
+                self.daughter_ids,
                 composer_config={
                     self.parameters['name']: self.parameters},
             )
             return {'agents': divide_update}
-        return {'variable': {'x': self.parameters['x_growth']}}
+        return {'variable': {'x': self.x_growth}}
 
 
 class ToyDividerStep(Step):
@@ -5,8 +5,7 @@ Composite, Composer, and MetaComposer Classes
 """
 
 import abc
-import copy
-from typing import Dict, Any, Optional, Iterable, List
+from typing import Dict, Any, Optional, Iterable, List, Mapping
 
 from vivarium.core.process import (
     _override_schemas, assoc_in, _get_parameters, Process)
@@ -16,7 +15,8 @@ from vivarium.core.types import (
     Processes, Topology, HierarchyPath, State, Schema, Steps, Flow)
 from vivarium.library.datum import Datum
 from vivarium.library.dict_utils import (
-    deep_merge, deep_merge_check, deep_copy_internal)
+    deep_merge, deep_merge_check, deep_copy_internal, deep_copy,
+    _is_mapping)
 from vivarium.library.topology import inverse_topology
 
 
@@ -91,6 +91,29 @@ def _get_composite_state(
     return state
 
 
+def _check_no_conflicts(
+        existing: dict,
+        new: Mapping,
+        path: HierarchyPath = (),
+) -> None:
+    """Check that ``new`` can be deep-merged into ``existing``.
+
+    This raises the same errors as
+    :py:func:`vivarium.library.dict_utils.deep_merge_check`, but only
+    walks ``new`` and does not modify either dictionary.
+    """
+    for key, value in new.items():
+        if key not in existing:
+            continue
+        current = existing[key]
+        if isinstance(current, dict) and _is_mapping(value):
+            _check_no_conflicts(current, value, path + (key,))
+        elif current is not value:
+            raise ValueError(
+                f'Failure to deep-merge dictionaries at path '
+                f'{path + (key,)}: {current} IS NOT {value}')
+
+
 class Composite(Datum):
     """Composite parent class.
 
@@ -162,7 +185,7 @@ class Composite(Datum):
         """
         config = config or {}
         initial_state = config.get('initial_state', {})
-        initial_state = deep_merge(copy.deepcopy(self.state), initial_state)
+        initial_state = deep_merge(deep_copy(self.state), initial_state)
         return _get_composite_state(
             processes=self.processes,
             steps=self.steps,
@@ -240,9 +263,13 @@ class Composite(Datum):
         deep_merge(self.state, merge_state)
         self._schema.update(schema_override)
 
-        processes_and_steps = deep_copy_internal(self.processes)
-        deep_merge_check(processes_and_steps, self.steps)
-        _override_schemas(self._schema, processes_and_steps)
+        # check for conflicts between processes and steps without
+        # copying the whole composite
+        _check_no_conflicts(self.processes, self.steps)
+        if self._schema:
+            processes_and_steps = deep_copy_internal(self.processes)
+            deep_merge(processes_and_steps, self.steps)
+            _override_schemas(self._schema, processes_and_steps)
 
     def get_parameters(self) -> Dict:
         """Get the parameters for all :term:`processes`.
@@ -283,7 +310,7 @@ class Composer(metaclass=abc.ABCMeta):
         elif not hasattr(self, 'name'):
             self.name = self.__class__.__name__
 
-        self.config = copy.deepcopy(self.defaults)
+        self.config = deep_copy(self.defaults)
         self.config = deep_merge(self.config, config)
         self.schema_override = self.config.pop('_schema', {})
 
@@ -402,7 +429,7 @@ class Composer(metaclass=abc.ABCMeta):
         if config is None:
             config = self.config
         else:
-            default = copy.deepcopy(self.config)
+            default = deep_copy(self.config)
             config = deep_merge(default, config)
 
         processes = self.generate_processes(config)
@@ -473,7 +500,7 @@ class MetaComposer(Composer):
         combined: Dict = {}
         for composer in self.composers:
             func = getattr(composer, method)
-            composer_config = copy.deepcopy(composer.config)
+            composer_config = deep_copy(composer.config)
             deep_merge(composer_config, config)
             new = func(composer_config)
             if set(combined.keys()) & set(new.keys()):
@@ -7,25 +7,99 @@ Run experiments and analyses from the command line.
 """
 
 import os
+import re
+import sys
 import argparse
-import copy
+import functools
+import pickle
+from copy import deepcopy
+from types import MappingProxyType
 
 # typing
 from typing import (
-    Any, Dict, Optional, Union, Sequence, List)
+    Any, Callable, Dict, Optional, Union, Sequence, List, Mapping, Tuple)
+
+import numpy as np
+import pytest
+
 from vivarium.core.types import OutputDict
+from vivarium.plots import pure_plot, is_pure_plot
 
-from vivarium.core.engine import timestamp
 from vivarium.core.directories import BASE_OUT_DIR
-from vivarium.composites.toys import ToyCompartment, run_composer
-
-from vivarium.plots.simulation_output import plot_simulation_output
 
 
 def make_dir(out_dir: str = 'out') -> None:
     os.makedirs(out_dir, exist_ok=True)  # pragma: no cover
 
 
+# pickle backend for _fast_clone, resolved once at import
+_pickle_dumps = pickle.dumps
+_pickle_loads = pickle.loads
+_PICKLE_PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+_IMMUTABLE_TYPES = (int, float, complex, str, bytes, type(None), np.generic)
+
+
+def _fast_clone(data: Any) -> Any:
+    """Deep copy ``data`` through a pickle round trip
+
+    Simulation output is plain nested data, which pickle copies much
+    faster than :py:func:`copy.deepcopy`. Falls back to
+    :py:func:`copy.deepcopy` for data that cannot be pickled.
+    """
+    try:
+        return _pickle_loads(_pickle_dumps(data, protocol=_PICKLE_PROTOCOL))
+    except (pickle.PicklingError, TypeError, AttributeError):
+        return deepcopy(data)
+
+
+def _smart_copy(data: Any) -> Any:
+    """Copy the containers in ``data`` while sharing its array buffers
+
+    Dicts, lists, and tuples are rebuilt, and NumPy arrays are replaced
+    with read-only views of the original buffers, so copying costs
+    nothing per array element. Immutable scalars are shared, and any
+    other values are cloned with :py:func:`_fast_clone`.
+    """
+    if isinstance(data, dict):
+        return {key: _smart_copy(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_smart_copy(value) for value in data]
+    if isinstance(data, tuple):
+        return tuple(_smart_copy(value) for value in data)
+    if isinstance(data, np.ndarray):
+        view = data.view()
+        view.flags.writeable = False
+        return view
+    if isinstance(data, _IMMUTABLE_TYPES):
+        return data
+    return _fast_clone(data)
+
+
+@functools.lru_cache(maxsize=32)
+def _control_parser(
+        workflow_choices: Tuple[str, ...],
+        experiment_choices: Tuple[str, ...],
+) -> argparse.ArgumentParser:
+    """Build the :py:class:`Control` parser for the given choices"""
+    parser = argparse.ArgumentParser(
+        description='command line control of experiments'
+    )
+    parser.add_argument(
+        '--workflow', '-w',
+        type=str,
+        choices=workflow_choices,
+        help='the workflow id'
+    )
+    parser.add_argument(
+        '--experiment', '-e',
+        type=str,
+        choices=experiment_choices,
+        help='experiment id to run'
+    )
+    return parser
+
+
 class Control:
     """ Control experiments from the command line
 
@@ -33,6 +107,13 @@ class Control:
     and trigger them from the command line
     """
 
+    __slots__ = (
+        'experiments_library', 'composers_library', 'plots_library',
+        'workflows_library', 'output_data', 'out_dir', 'args',
+        '_experiments_norm', '_plots_norm', '_workflows_norm',
+        '_workflow_choices', '_experiment_choices',
+    )
+
     def __init__(
             self,
             out_dir: Optional[str] = None,
@@ -42,22 +123,45 @@ class Control:
             workflows: Optional[Dict[str, Any]] = None,
             args: Optional[Sequence[str]] = None,
     ) -> None:
-        workflows = workflows or {}
-        experiments = experiments or {}
-        plots = plots or {}
-        workflows = workflows or {}
-
-        self.experiments_library = experiments
-        self.compposers_library = composers
-        self.plots_library = plots
-        self.workflows_library = workflows
+        # read-only snapshots, since the resolved entries below are
+        # computed from them once
+        self.experiments_library: Mapping[str, Any] = MappingProxyType(
+            dict(experiments or {}))
+        self.composers_library: Mapping[str, Any] = MappingProxyType(
+            dict(composers or {}))
+        self.plots_library: Mapping[str, Any] = MappingProxyType(
+            dict(plots or {}))
+        self.workflows_library: Mapping[str, Any] = MappingProxyType(
+            dict(workflows or {}))
         self.output_data = None
 
+        # resolve library entries to their functions once up front
+        self._experiments_norm: Dict[str, Callable] = {
+            experiment_id: (
+                experiment['experiment'] if isinstance(experiment, dict)
+                else experiment)
+            for experiment_id, experiment in self.experiments_library.items()
+        }
+        self._plots_norm: Dict[str, Tuple[Callable, Dict[str, Any]]] = {
+            plot_id: self._normalize_plot(plot)
+            for plot_id, plot in self.plots_library.items()
+        }
+
         # base output directory
         self.out_dir = BASE_OUT_DIR
         if out_dir:
             self.out_dir = out_dir
 
+        # workflow experiments, plots, and output directories
+        self._workflows_norm: Dict[str, Tuple[Any, Tuple, str]] = {
+            workflow_id: self._normalize_workflow(workflow)
+            for workflow_id, workflow in self.workflows_library.items()
+        }
+
+        # command line choices
+        self._workflow_choices = tuple(self.workflows_library)
+        self._experiment_choices = tuple(self.experiments_library)
+
         # arguments
         self.args = self.parse_args(args)
 
@@ -72,113 +176,179 @@ class Control:
     def parse_args(
             self, args: Optional[Sequence[str]] = None
     ) -> argparse.Namespace:
-        parser = argparse.ArgumentParser(
-            description='command line control of experiments'
-        )
-        parser.add_argument(
-            '--workflow', '-w',
-            type=str,
-            choices=list(self.workflows_library.keys()),
-            help='the workflow id'
-        )
-        parser.add_argument(
-            '--experiment', '-e',
-            type=str,
-            choices=list(self.experiments_library.keys()),
-            help='experiment id to run'
-        )
+        if args is None:
+            args = sys.argv[1:]
+        if not args:
+            # nothing to parse, so skip building the parser
+            return argparse.Namespace(workflow=None, experiment=None)
+
+        parser = _control_parser(
+            self._workflow_choices, self._experiment_choices)
         return parser.parse_args(args)
 
     def run_experiment(
             self,
             experiment_config: Union[str, dict]
     ) -> OutputDict:
+        handler = _EXPERIMENT_HANDLERS.get(
+            type(experiment_config), Control._run_other_experiment)
+        return handler(self, experiment_config)
 
-        if isinstance(experiment_config, dict):
-            if 'experiment_id' in experiment_config:
-                experiment_id = experiment_config.pop('experiment_id')
-                experiment = self.experiments_library[experiment_id]
-            else:
-                experiment = experiment_config.pop('experiment')
-            return experiment(**experiment_config)
+    def _run_experiment_id(self, experiment_id: str) -> OutputDict:
+        return self._experiments_norm[experiment_id]()
 
+    def _run_experiment_config(
+            self, experiment_config: dict
+    ) -> OutputDict:
+        if 'experiment_id' in experiment_config:
+            experiment = self._experiments_norm[
+                experiment_config['experiment_id']]
+        else:
+            experiment = experiment_config['experiment']
+        experiment_kwargs = {
+            key: value for key, value in experiment_config.items()
+            if key not in ('experiment_id', 'experiment')}
+        return experiment(**experiment_kwargs)
+
+    def _run_other_experiment(self, experiment_config: Any) -> OutputDict:
+        # subclasses of str and dict miss the exact type lookup
+        if isinstance(experiment_config, dict):
+            return self._run_experiment_config(experiment_config)
         if isinstance(experiment_config, str):
-            experiment = self.experiments_library[experiment_config]
-            if isinstance(experiment, dict):
-                experiment = experiment.pop('experiment')
-            return experiment()
-
+            return self._run_experiment_id(experiment_config)
         raise ValueError(f'invalid experiment config: {experiment_config}')
 
+    def _normalize_plot(
+            self, plot_config: Any
+    ) -> Tuple[Callable, Dict[str, Any]]:
+        """Resolve a plot library entry to its function and kwargs"""
+        if isinstance(plot_config, dict):
+            plot_kwargs = {
+                key: value for key, value in plot_config.items()
+                if key not in ('plot_id', 'plot')}
+            if 'plot_id' in plot_config:
+                plot = self.plots_library[plot_config['plot_id']]
+            else:
+                plot = plot_config['plot']
+            return plot, plot_kwargs
+        if callable(plot_config):
+            return plot_config, {}
+        raise ValueError(f'invalid plot config: {plot_config}')
+
+    def _resolve_plot(
+            self, plot_config: Union[str, dict, Callable]
+    ) -> Tuple[Callable, Dict[str, Any]]:
+        """Resolve a plot id or config to its function and kwargs"""
+        if isinstance(plot_config, str):
+            return self._plots_norm[plot_config]
+        return self._normalize_plot(plot_config)
+
     def run_one_plot(
             self,
             plot_config: Union[str, dict],
             data: OutputDict,
             out_dir: Optional[str] = None,
+            copy_data: bool = False,
     ) -> None:
-        data_copy = copy.deepcopy(data)
-
-        if isinstance(plot_config, str):
-            plot_config = self.plots_library[plot_config]
-
-        if isinstance(plot_config, dict):
-            if 'plot_id' in plot_config:
-                plot_id = plot_config.pop('plot_id')
-                plot = self.plots_library[plot_id]
-            else:
-                plot = plot_config.pop('plot')
-            plot(
-                data=data_copy,
-                out_dir=out_dir,
-                **plot_config)
-
-        elif callable(plot_config):
-            # call plot directly
-            plot_config(
-                data=data_copy,
-                out_dir=out_dir)
-        else:
-            raise ValueError(f'invalid plot config: {plot_config}')
+        """Run a single plot on ``data``
+
+        Plots receive ``data`` directly and are expected not to mutate
+        it. Set ``copy_data`` to give the plot its own copy instead,
+        unless the plot is marked with
+        :py:func:`vivarium.plots.pure_plot`. The copy has new
+        containers, but NumPy arrays in it are read-only views of the
+        original arrays.
+        """
+        plot, plot_kwargs = self._resolve_plot(plot_config)
+        if copy_data and not is_pure_plot(plot):
+            data = _smart_copy(data)
+        plot(
+            data=data,
+            out_dir=out_dir,
+            **plot_kwargs)
 
     def run_plots(
             self,
-            plot_ids: Union[list, str],
+            plot_ids: Union[
+                str, dict, Callable, Sequence[Union[str, dict, Callable]]],
             data: OutputDict,
             out_dir: Optional[str] = None,
+            copy_data: bool = False,
     ) -> None:
-
-        if isinstance(plot_ids, list):
-            for plot_id in plot_ids:
-                self.run_one_plot(plot_id, data, out_dir=out_dir)
-        else:
-            self.run_one_plot(plot_ids, data, out_dir=out_dir)
-
-    def run_workflow(self, workflow_id: str) -> None:
-        workflow = self.workflows_library[workflow_id]
-        experiment_id = workflow['experiment']
-        plot_ids = workflow.get('plots')
-
-        # output directory for this workflow
-        workflow_name = workflow.get('name', timestamp())
-        out_dir = os.path.join(self.out_dir, workflow_name)
+        """Run a plot or a sequence of plots on ``data``
+
+        If ``copy_data`` is set, ``data`` is copied once and the copy is
+        shared by all of the plots that are not marked with
+        :py:func:`vivarium.plots.pure_plot`. See :py:meth:`run_one_plot`
+        for how data are copied.
+        """
+        if isinstance(plot_ids, (str, dict)) or callable(plot_ids):
+            plot_ids = [plot_ids]
+        plots = [self._resolve_plot(plot_id) for plot_id in plot_ids]
+        data_copy = data
+        if copy_data and not all(is_pure_plot(plot) for plot, _ in plots):
+            data_copy = _smart_copy(data)
+        for plot, plot_kwargs in plots:
+            plot(
+                data=data if is_pure_plot(plot) else data_copy,
+                out_dir=out_dir,
+                **plot_kwargs)
+
+    def _normalize_workflow(
+            self, workflow: Dict[str, Any]
+    ) -> Tuple[Any, Tuple, str]:
+        """Resolve a workflow to its experiment, plots, and output directory
+
+        Unnamed workflows are given a timestamp from when the
+        :py:class:`Control` was constructed.
+        """
+        workflow_name = workflow.get('name')
+        if not workflow_name:
+            from vivarium.core.engine import (  # pylint: disable=import-outside-toplevel
+                timestamp)
+            workflow_name = timestamp()
+        out_dir = f'{self.out_dir}{os.sep}{workflow_name}'
+        plot_ids = workflow.get('plots') or ()
+        if not isinstance(plot_ids, (list, tuple)):
+            plot_ids = (plot_ids,)
+        return workflow['experiment'], tuple(plot_ids), out_dir
+
+    def run_workflow(
+            self,
+            workflow_id: str,
+            copy_data: bool = False,
+    ) -> None:
+        experiment_id, plot_ids, out_dir = self._workflows_norm[workflow_id]
 
         # run the experiment
         self.output_data = self.run_experiment(experiment_id)
 
         # run the plots
         if plot_ids:
-            self.run_plots(plot_ids, self.output_data, out_dir=out_dir)
+            self.run_plots(
+                plot_ids, self.output_data, out_dir=out_dir,
+                copy_data=copy_data)
             print('plots saved to directory: {}'.format(out_dir))
 
 
+_EXPERIMENT_HANDLERS: Dict[type, Callable[[Control, Any], OutputDict]] = {
+    str: Control._run_experiment_id,  # pylint: disable=protected-access
+    dict: Control._run_experiment_config,  # pylint: disable=protected-access
+}
+
+
 # testing
 
+@pure_plot
 def toy_plot(
         data: OutputDict,
         config: Optional[Dict] = None,
         out_dir: Optional[str] = 'out'
 ) -> None:
     del config  # unused
+    # imported here so that importing control does not load matplotlib
+    from vivarium.plots.simulation_output import (  # pylint: disable=import-outside-toplevel
+        plot_simulation_output)
     plot_simulation_output(data, out_dir=out_dir)
 
 
@@ -189,6 +359,9 @@ def toy_control(
     To run:
     > python vivarium/core/control.py -w 1
     """
+    from vivarium.composites.toys import (  # pylint: disable=import-outside-toplevel
+        ToyCompartment, run_composer)
+
     experiment_library = {
         # put in dictionary with name
         '1': {
@@ -239,37 +412,42 @@ def is_float(element: Any) -> bool:
         return False
 
 
+_LITERALS: Dict[str, Optional[bool]] = {
+    'True': True,
+    'False': False,
+    'None': None,
+    'null': None,
+}
+_INT_PATTERN = re.compile(r'[-+]?\d+')
+_FLOAT_PATTERN = re.compile(
+    r'[-+]?((\d+\.?\d*|\.\d+)([eE][-+]?\d+)?|inf(inity)?|nan)',
+    re.IGNORECASE)
+
+
 def _parse_options(
         options_list: Optional[List[str]]
-) -> Dict[str, Union[int, float, bool, str]]:
+) -> Dict[str, Union[int, float, bool, str, None]]:
     """Parse the KEY=VALUE or KEY=k=v option strings into a dict."""
-    assignments = options_list or []
-    pairs = [
-        a.split('=', 1) + [''] for a in assignments
-    ]  # [''] to handle the no-'=' case
-    options = {}
-    for p in pairs:
-        key: str = p[0]
-        str_value: str = p[1]
-        value: Any = None
-        if str_value.isdigit():
+    options: Dict[str, Union[int, float, bool, str, None]] = {}
+    for assignment in options_list or ():
+        # partition gives an empty value for the no-'=' case
+        key, _, str_value = assignment.partition('=')
+        value: Union[int, float, bool, str, None]
+        if str_value in _LITERALS:
+            value = _LITERALS[str_value]
+        elif _INT_PATTERN.fullmatch(str_value):
             value = int(str_value)
-        elif is_float(str_value):
+        elif _FLOAT_PATTERN.fullmatch(str_value):
             value = float(str_value)
-        elif str_value in ['True', 'False']:
-            value = bool(str_value)
         else:
             value = str_value
         options[key] = value
     return options
 
 
-def run_library_cli(library: dict, args: Optional[list] = None) -> None:
-    """Run experiments from the command line
-
-    Args:
-        library (dict): maps experiment id to experiment function
-    """
+@functools.lru_cache(maxsize=1)
+def _library_parser() -> argparse.ArgumentParser:
+    """Build the :py:func:`run_library_cli` parser"""
     parser = argparse.ArgumentParser(
         description='run experiments from the command line')
     parser.add_argument(
@@ -278,7 +456,16 @@ def run_library_cli(library: dict, args: Optional[list] = None) -> None:
     parser.add_argument(
         '--options', '-o', metavar='OPTION_KEY=VALUE',
         action='append', help='A "KEY=VALUE" option')
-    parser_args = parser.parse_args(args)
+    return parser
+
+
+def run_library_cli(library: dict, args: Optional[list] = None) -> None:
+    """Run experiments from the command line
+
+    Args:
+        library (dict): maps experiment id to experiment function
+    """
+    parser_args = _library_parser().parse_args(args)
     run_all = not parser_args.name
     options = _parse_options(parser_args.options)
 
@@ -297,17 +484,103 @@ def test_library_cli() -> None:
     run_library_cli(lib, args=['-n', '1', '-o', 'key=0.2'])
     run_library_cli(lib, args=['-n', '1', '-o', 'key=b'])
 
+    options = _parse_options([
+        'a=True', 'b=False', 'c=-3', 'd=0.2', 'e=1e-3', 'f=b', 'g=None'])
+    assert options == {
+        'a': True, 'b': False, 'c': -3, 'd': 0.2, 'e': 1e-3, 'f': 'b',
+        'g': None}
+    assert isinstance(options['c'], int)
+
+    assert is_float('0.2') and not is_float('b')
+
+    # values may contain '=', and a missing '=' gives an empty value
+    assert _parse_options(['a=k=v', 'b']) == {'a': 'k=v', 'b': ''}
+
 
 def test_control() -> None:
     toy_control(args=['-w', '1'])
     toy_control(args=['-w', '2'])
     control = toy_control(args=['-e', '2'])
+    control.run_workflow('1', copy_data=True)
+
+    # library entries are left intact, so they can be run again
     control.run_workflow('1')
 
+    # as are configs passed in by the caller
+    experiment_config = {'experiment_id': '2'}
+    plot_config = {'plot': toy_plot, 'config': {}}
+    for _ in range(2):
+        data = control.run_experiment(experiment_config)
+        control.run_one_plot(
+            plot_config, data, out_dir=os.path.join('out', 'control_test'))
+    assert experiment_config == {'experiment_id': '2'}
+    assert plot_config == {'plot': toy_plot, 'config': {}}
+
+    with pytest.raises(ValueError):
+        control.run_experiment(2)  # type: ignore
+
+    # no arguments, so nothing is run
+    control = toy_control(args=[])
+    assert control.args.workflow is None
+    assert control.output_data is None
+
+
+def test_fast_clone() -> None:
+    data: Dict[str, Any] = {'time': [0.0, 1.0], 'agent': {'x': [1, 2]}}
+    clone = _fast_clone(data)
+    assert clone == data
+    assert clone['agent']['x'] is not data['agent']['x']
+
+    # unpicklable data falls back to deepcopy
+    data['fun'] = lambda x: x
+    clone = _fast_clone(data)
+    assert clone['fun'] is data['fun']
+    assert clone['agent'] is not data['agent']
+
+
+def test_smart_copy() -> None:
+    array = np.arange(3.0)
+    data = {'agent': {'x': array, 'y': [1, (2.0, 'a')]}}
+    copy_data = _smart_copy(data)
+    assert copy_data['agent']['y'] == data['agent']['y']
+    assert copy_data['agent']['y'] is not data['agent']['y']
+    assert np.shares_memory(copy_data['agent']['x'], array)
+    assert not copy_data['agent']['x'].flags.writeable
+    assert array.flags.writeable
+
+
+def test_pure_plot() -> None:
+    plotted = []
+
+    def impure(data: OutputDict, out_dir: Optional[str] = None) -> None:
+        del out_dir  # unused
+        plotted.append(data)
+
+    @pure_plot
+    def pure(data: OutputDict, out_dir: Optional[str] = None) -> None:
+        del out_dir  # unused
+        plotted.append(data)
+
+    control = Control(plots={'impure': impure, 'pure': pure}, args=[])
+    data: OutputDict = {'time': [0.0, 1.0]}
+    control.run_plots(['impure', 'pure'], data, copy_data=True)
+    control.run_one_plot('pure', data, copy_data=True)
+    assert plotted[0] == data and plotted[0] is not data
+    assert plotted[1] is data
+    assert plotted[2] is data
+
+    # a single plot id is not treated as a sequence
+    control = Control(plots={'12': pure}, args=[])
+    control.run_plots('12', data)
+    assert len(plotted) == 4
+
 
 fun_lib = {
     '0': test_library_cli,
     '1': test_control,
+    '2': test_fast_clone,
+    '3': test_smart_copy,
+    '4': test_pure_plot,
 }
 
 
@@ -24,6 +24,7 @@ from vivarium.library.units import remove_units
 from vivarium.library.dict_utils import (
     value_in_embedded_dict,
     make_path_dict,
+    deep_copy_internal,
     deep_merge_check,
 )
 from vivarium.library.topology import (
@@ -251,6 +252,13 @@ class RAMEmitter(Emitter):
         self.saved_data: Dict[float, Dict[str, Any]] = {}
         self.fallback_serializer = make_fallback_serializer_function()
         self.embed_path = config.get('embed_path', tuple())
+        #: Number of history emits, which versions ``saved_data``.
+        self._emit_count = 0
+        # (emit count, query, data) of the last get_data() query
+        self._query_cache: Tuple[int, Any, dict] = (-1, None, {})
+
+    def _count_emit(self) -> None:
+        self._emit_count += 1
 
     def emit(self, data: Dict[str, Any]) -> None:
         """
@@ -262,15 +270,31 @@ class RAMEmitter(Emitter):
             emit_data = data['data'].copy()
             time = emit_data.pop('time', None)
             data_at_time = assoc_path({}, self.embed_path, emit_data)
-            self.saved_data.setdefault(time, {})
             data_at_time = serialize_value(
                 data_at_time, self.fallback_serializer)
-            deep_merge_check(
-                self.saved_data[time], data_at_time, check_equality=True)
+            saved_at_time = self.saved_data.get(time)
+            if saved_at_time is None:
+                # nothing to merge with, so keep the serialized copy
+                self.saved_data[time] = data_at_time
+            else:
+                deep_merge_check(
+                    saved_at_time, data_at_time, check_equality=True)
+            self._count_emit()
 
     def get_data(self, query: Optional[list] = None) -> dict:
-        """ Return the accumulated timeseries history of "emitted" data. """
+        """ Return the accumulated timeseries history of "emitted" data.
+
+        The data for a query is kept until the next emit, so repeating
+        the query in between only copies the dictionaries that hold it.
+        """
         if query:
+            query_key = tuple(tuple(path) for path in query)
+            emit_count, cached_query, cached_data = self._query_cache
+            if (
+                    emit_count == self._emit_count
+                    and cached_query == query_key):
+                # copy so that callers cannot change the cached data
+                return deep_copy_internal(cached_data)
             returned_data = {}
             for t, data in self.saved_data.items():
                 paths_data = []
@@ -280,6 +304,8 @@ class RAMEmitter(Emitter):
                         path_data = (path, datum)
                         paths_data.append(path_data)
                 returned_data[t] = paths_to_dict(paths_data)
+            self._query_cache = (
+                self._emit_count, query_key, deep_copy_internal(returned_data))
             return returned_data
         return self.saved_data
 
@@ -291,6 +317,7 @@ class SharedRamEmitter(RAMEmitter):
     """
 
     saved_data: Dict[float, Dict[str, Any]] = {}
+    _emit_count = 0
 
     def __init__(self, config: Dict[str, Any]) -> None:  # pylint: disable=super-init-not-called
         # We intentionally don't call the superclass constructor because
@@ -298,6 +325,11 @@ class SharedRamEmitter(RAMEmitter):
         # attribute.
         self.fallback_serializer = make_fallback_serializer_function()
         self.embed_path = config.get('embed_path', tuple())
+        self._query_cache = (-1, None, {})
+
+    def _count_emit(self) -> None:
+        # emits from every instance change the shared data
+        SharedRamEmitter._emit_count += 1
 
 
 class DatabaseEmitter(Emitter):
@@ -784,5 +816,23 @@ def test_breakdown() -> None:
         ((), {'a': [1, 2, 3]})]
 
 
+def test_ram_emitter_query() -> None:
+    emitter = RAMEmitter({})
+    emitter.emit({'table': 'history', 'data': {'time': 0, 'a': 1, 'b': 2}})
+    data = emitter.get_data([('a',)])
+    assert data == {0: {'a': 1}}
+    # changing the returned data does not change later queries
+    data[0]['a'] = 5
+    data.pop(0)
+    assert emitter.get_data([('a',)]) == {0: {'a': 1}}
+    assert emitter.get_data([('b',)]) == {0: {'b': 2}}
+    # a new emit invalidates the queried data
+    emitter.emit({'table': 'history', 'data': {'time': 0, 'a': 1, 'c': 3}})
+    assert emitter.get_data([('c',)]) == {0: {'c': 3}}
+    emitter.emit({'table': 'history', 'data': {'time': 1, 'a': 4}})
+    assert emitter.get_data([('a',)]) == {0: {'a': 1}, 1: {'a': 4}}
+
+
 if __name__ == '__main__':
     test_breakdown()
+    test_ram_emitter_query()
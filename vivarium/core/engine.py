@@ -12,9 +12,10 @@ import os
 import logging as log
 import pprint
 import re
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import (
     Any, Dict, Optional, Union, Tuple, Callable, Iterable, List,
-    cast, Sequence)
+    cast, Sequence, Set)
 import math
 import datetime
 import time as clock
@@ -26,8 +27,8 @@ import numpy as np
 import pytest
 
 from vivarium.core.store import (
-    hierarchy_depth, Store, generate_state, view_values)
-from vivarium.core.emitter import get_emitter, Emitter
+    hierarchy_depth, Store, generate_state)
+from vivarium.core.emitter import get_emitter, Emitter, NullEmitter
 from vivarium.core.process import (
     Process,
     ParallelProcess,
@@ -75,9 +76,17 @@ def starts_with(
     Returns:
         True if ``sub`` is a prefix of ``a_list``; False otherwise.
     """
-    return len(sub) <= len(a_list) and all(
-        a_list[i] == el
-        for i, el in enumerate(sub))
+    return len(sub) <= len(a_list) and (
+        tuple(a_list[:len(sub)]) == tuple(sub))
+
+
+def _under_paths(
+        path: HierarchyPath,
+        prefixes: Set[HierarchyPath],
+) -> bool:
+    """Check whether any of a set of paths is a prefix of ``path``."""
+    return any(
+        path[:depth] in prefixes for depth in range(len(path) + 1))
 
 
 def invert_topology(
@@ -121,7 +130,7 @@ def timestamp(dt: Optional[Any] = None) -> str:
         dt.hour, dt.minute, dt.second)
 
 
-def empty_front(t: float) -> Dict[str, Union[float, dict]]:
+def empty_front(t: float) -> Dict[str, Any]:
     return {
         'time': t,
         'update': {}}
@@ -178,6 +187,64 @@ class EmptyDefer(Defer):
         return {}
 
 
+class ResolvedDefer(Defer):
+    def __init__(self, update: Update) -> None:
+        """A :py:class:`Defer` holding an already-computed update."""
+        def function(update: dict, _: tuple) -> dict:
+            return update
+        args = ()
+        super().__init__(None, function, args)
+        self.update = update
+
+    def get(self) -> Update:
+        return self.update
+
+
+class ProcessDefer(Defer):
+    def __init__(
+            self,
+            process: Process,
+            path: HierarchyPath,
+            store: Store,
+    ) -> None:
+        """A :py:class:`Defer` holding a process's update.
+
+        :py:meth:`get` inverts the update through the process's topology
+        with :py:func:`invert_topology`. This object also remembers the
+        stores the process's ports led to when the update was requested
+        (see :py:meth:`vivarium.core.store.Store.port_stores`), so that
+        the update can be applied to them directly instead.
+
+        Args:
+            process: The process computing the update.
+            path: Path to the process.
+            store: The store at ``path``.
+        """
+        super().__init__(process, invert_topology, (path, store.topology))
+        self.store = store
+        self.port_stores = store.port_stores()
+
+    def get_port_stores(self) -> Optional[Dict[str, Store]]:
+        """Get the stores to apply the update to port by port.
+
+        Returns:
+            A dictionary from each port to its store, or ``None`` if the
+            update has to be inverted and applied from the root instead,
+            including when the hierarchy structure has changed since
+            the update was requested.
+        """
+        if self.store.port_stores() is not self.port_stores:
+            return None
+        return self.port_stores
+
+    def get_port_update(self) -> Update:
+        """Get the update as the process returned it.
+
+        Call either this or :py:meth:`get`, not both.
+        """
+        return self.defer.get_command_result()
+
+
 class _StepGraph:
     """A dependency graph of :term:`steps`.
 
@@ -200,6 +267,9 @@ class _StepGraph:
             sequentially and before the steps in ``graph``. This is
             where we store legacy :term:`derivers` for
             backwards-compatibility.
+        version: A counter that is incremented every time a step is
+            added or removed, so callers can tell when execution layers
+            they computed earlier have gone stale.
     """
 
     def __init__(
@@ -210,17 +280,13 @@ class _StepGraph:
         self._graph = graph or nx.DiGraph()
         self._sequential_steps: List[HierarchyPath] = (
             sequential_steps or [])
+        self.version = 0
 
-    def _validate(self) -> None:
-        if not nx.is_directed_acyclic_graph(self._graph):
-            raise ValueError('Step graph must be a DAG.')
-        graph_steps = set(self._graph.nodes)
-        sequential_steps = set(self._sequential_steps)
-        intersection = graph_steps & sequential_steps
-        if intersection:
-            raise ValueError(
-                'self._graph and self._sequential_steps have '
-                f'overlapping steps: {intersection}')
+    @staticmethod
+    def _overlap_error(intersection: Set[HierarchyPath]) -> ValueError:
+        return ValueError(
+            'self._graph and self._sequential_steps have '
+            f'overlapping steps: {intersection}')
 
     def add(
             self,
@@ -236,10 +302,22 @@ class _StepGraph:
             ValueError: If the graph produced by adding the step is not
                 a DAG.
         """
+        dependencies = list(dependencies)
+        # only the new edges into ``path`` can close a cycle, and only
+        # if ``path`` already has steps depending on it
+        had_dependents = path in self._graph and bool(
+            self._graph.succ[path])
         self._graph.add_node(path)
         for dependency in dependencies:
             self._graph.add_edge(dependency, path)
-        self._validate()
+        self.version += 1
+        if path in dependencies or (had_dependents and not nx.descendants(
+                self._graph, path).isdisjoint(dependencies)):
+            raise ValueError('Step graph must be a DAG.')
+        intersection = set(self._sequential_steps).intersection(
+            [path, *dependencies])
+        if intersection:
+            raise self._overlap_error(intersection)
 
     def add_sequential(
             self,
@@ -255,8 +333,10 @@ class _StepGraph:
         Args:
             path: The path to the step in the hierarchy.
         """
+        if path in self._graph:
+            raise self._overlap_error({path})
         self._sequential_steps.append(path)
-        self._validate()
+        self.version += 1
 
     def get_execution_layers(self) -> List[List[HierarchyPath]]:
         """Get step execution layers, with steps represnted by paths.
@@ -277,9 +357,26 @@ class _StepGraph:
             An ordered list of the execution layers, with each step
             represented by its path.
         """
-        layers = nx.topological_generations(self._graph)
         to_return = [[step] for step in self._sequential_steps]
-        to_return += [sorted(layer) for layer in layers]
+        successors = self._graph.succ
+        # count down a copy of each step's in-degree so the graph
+        # itself is left untouched
+        in_degrees = dict(self._graph.in_degree())
+        layer = sorted(
+            step for step, degree in in_degrees.items() if degree == 0)
+        while layer:
+            to_return.append(layer)
+            next_layer = []
+            for step in layer:
+                for successor in successors[step]:
+                    in_degrees[successor] -= 1
+                    if in_degrees[successor] == 0:
+                        next_layer.append(successor)
+            layer = sorted(next_layer)
+        # steps on a cycle never reach an in-degree of zero
+        n_layered = sum(len(layer) for layer in to_return)
+        if n_layered < len(self._graph) + len(self._sequential_steps):
+            raise ValueError('Step graph must be a DAG.')
         return to_return
 
     def remove(self, path: HierarchyPath) -> None:
@@ -290,11 +387,13 @@ class _StepGraph:
         """
         if path in self._sequential_steps:
             self._sequential_steps.remove(path)
+            self.version += 1
             return
         to_delete = nx.algorithms.dag.descendants(self._graph, path)
         to_delete.add(path)
         for path_to_delete in to_delete:
             self._graph.remove_node(path_to_delete)
+        self.version += 1
 
     def copy(self) -> '_StepGraph':
         """Create a copy of self.
@@ -332,6 +431,8 @@ class Engine:
             global_time_precision: Optional[int] = None,
             profile: bool = False,
             initial_global_time: float = 0,
+            *,
+            step_workers: int = 0,
     ) -> None:
         """Defines simulations
 
@@ -403,6 +504,18 @@ class Engine:
             initial_global_time: The initial time for the simulation.
                 Useful when this Engine is part of a larger, older
                 simulation.
+            step_workers: Number of threads to use for computing the
+                updates of the steps in each execution layer
+                concurrently. Steps in the same layer never depend on
+                each other, so their updates can be computed in any
+                order, but updates are still applied in layer order.
+                Only ``next_update`` runs in the threads; the steps'
+                views of the state are built beforehand. This only
+                helps for steps whose ``next_update`` releases the GIL
+                (e.g. I/O or NumPy-heavy work). Parallel steps
+                already run in their own OS processes and are not sent
+                to the thread pool. By default (``0``), steps run
+                serially in the calling thread.
         """
         self.profiler: Optional[cProfile.Profile] = None
         if profile:
@@ -432,10 +545,23 @@ class Engine:
         # get a mapping of all paths to processes
         self.process_paths: Dict[HierarchyPath, Process] = {}
         self._step_graph = _StepGraph()
+        # execution layers of self._step_graph, recomputed only when
+        # the graph's version changes
+        self._cached_layers: Tuple[Tuple[HierarchyPath, ...], ...] = ()
+        self._cached_layers_version: Optional[int] = None
         self._step_paths: Dict[HierarchyPath, Process] = {}
+        # deleted paths whose processes and steps are still indexed,
+        # removed together by _flush_deletions()
+        self._pending_deletions: List[HierarchyPath] = []
+        # paths of deleted processes whose front entries are removed by
+        # _remove_deleted_fronts() unless a process is added back there
+        self._deleted_fronts: Set[HierarchyPath] = set()
         self._find_process_paths(self.processes, self.flow)
         self._find_step_paths(self.steps, self.flow)
         self._validate_steps_and_flow(self._step_paths, self.flow)
+        self._step_pool: Optional[ThreadPoolExecutor] = None
+        if step_workers > 0:
+            self._step_pool = ThreadPoolExecutor(max_workers=step_workers)
 
         # emitter settings
         emitter_config = emitter
@@ -474,11 +600,13 @@ class Engine:
         # logging information
         log.info('experiment %s', str(self.experiment_id))
 
-        log.info('\nPROCESSES:')
-        log.info(pf(self.processes))
+        # formatting the processes and topology is slow for large models
+        if log.getLogger().isEnabledFor(log.INFO):
+            log.info('\nPROCESSES:')
+            log.info(pf(self.processes))
 
-        log.info('\nTOPOLOGY:')
-        log.info(pf(self.topology))
+            log.info('\nTOPOLOGY:')
+            log.info(pf(self.topology))
 
     @staticmethod
     def _validate_steps_and_flow(
@@ -636,8 +764,15 @@ class Engine:
         for path, step in tree.items():
             self._add_step_path(step, path, get_in(flow, path))
 
+    def _emits_nothing(self) -> bool:
+        """Whether the emitter discards everything, as the null emitter
+        does, so the data to emit need not be collected."""
+        return type(self.emitter).emit is NullEmitter.emit
+
     def _emit_configuration(self) -> None:
         """Emit experiment configuration."""
+        if self._emits_nothing():
+            return
         data: Dict[str, Any] = {
             'time_created': self.time_created,
             'experiment_id': self.experiment_id,
@@ -661,6 +796,8 @@ class Engine:
         """Emit the current simulation state.
         Only variables with ``_emit=True`` are emitted.
         """
+        if self._emits_nothing():
+            return
         data = self.state.emit_data()
         data.update({
             'time': self.global_time})
@@ -693,7 +830,7 @@ class Engine:
         topology_view = store.topology_view
         assert topology_view is not None, \
             f"store at path {path} does not have a topology_view"
-        states = view_values(topology_view)
+        states = store.view_values()
 
         return store, states
 
@@ -737,13 +874,109 @@ class Engine:
             a bool indicating whether the topology_views expired.
         """
 
+        view_expire = self._apply_update(update, state)
+        self._flush_deletions()
+        return view_expire
+
+    def _apply_update(self, update: Update, state: Store) -> bool:
+        """Apply an update like :py:meth:`apply_update`, but leave the
+        processes and steps of deleted paths for
+        :py:meth:`_flush_deletions` to remove from the indices."""
         if not update:
             return False
 
+        return self._apply_structure_updates(
+            self.state.apply_update(update, state))
+
+    def _apply_deferred(self, update: Defer, state: Store) -> bool:
+        """Apply a deferred update.
+
+        A process's update is applied port by port to the stores its
+        ports lead to when possible, which skips inverting the update
+        through the topology and walking it down from the root.
+
+        Args:
+            update: The deferred update.
+            state: The store from whose perspective the update was
+                generated.
+
+        Return:
+            a bool indicating whether the topology_views expired.
+        """
+        if isinstance(update, ProcessDefer):
+            port_stores = update.get_port_stores()
+            if port_stores is not None:
+                return self._apply_port_update(
+                    update.get_port_update(), port_stores, state)
+        return self._apply_update(update.get(), state)
+
+    def _apply_port_update(
+            self,
+            update: Update,
+            port_stores: Dict[str, Store],
+            state: Store,
+    ) -> bool:
+        """Apply a process's update directly to its ports' stores.
+
+        Args:
+            update: The update, as returned by the process.
+            port_stores: Map from each port to the store it leads to.
+            state: The store from whose perspective the update was
+                generated.
+
+        Return:
+            a bool indicating whether the topology_views expired.
+        """
+        results: Optional[Tuple[list, list, list, list, list]] = None
+        view_expire = False
+        for port, value in update.items():
+            port_store = port_stores.get(port)
+            if port_store is None:
+                continue
+            port_results = port_store.apply_update(value, state)
+            if any(port_results):
+                if results is None:
+                    results = ([], [], [], [], [])
+                for collected, new in zip(results, port_results):
+                    if new:
+                        collected.extend(new)
+                view_expire = view_expire or bool(port_results[5])
+        if results is None:
+            # no port changed the structure of the simulation state
+            return False
+        return self._apply_structure_updates((*results, view_expire))
+
+    def _apply_structure_updates(
+            self,
+            results: Tuple[list, list, list, list, list, bool],
+    ) -> bool:
+        """Update the engine after the processes, steps, or topology in
+        the simulation state changed.
+
+        Args:
+            results: The tuple returned by
+                :py:meth:`vivarium.core.store.Store.apply_update`:
+
+                * Tuples ``(path, topology)`` of new topologies.
+                * Tuples ``(path, process)`` of new processes.
+                * Tuples ``(path, step)`` of new steps.
+                * Tuples ``(path, dependencies)`` of new flows.
+                * Paths that were deleted.
+                * Whether the topology_views expired.
+
+        Return:
+            Whether the topology_views expired.
+        """
         (
             topology_updates, process_updates, step_updates,
-            flow_updates, deletions, view_expire
-        ) = self.state.apply_update(update, state)
+            flow_updates, deletions, view_expire) = results
+        if self._pending_deletions and (process_updates or step_updates):
+            # a new process may be at a path whose deletion is pending
+            pending = set(self._pending_deletions)
+            if any(
+                    _under_paths(path, pending)
+                    for path, _ in process_updates + step_updates):
+                self._flush_deletions()
 
         process_updates = [
             (path, self._parallelize_processes(process))
@@ -800,26 +1033,92 @@ class Engine:
         delete_in(self.topology, deletion)
         delete_in(self.flow, deletion)
 
-        for path in list(self.process_paths.keys()):
-            if starts_with(path, deletion):
-                del self.process_paths[path]
-
-        for path in list(self._step_paths):
-            if starts_with(path, deletion):
-                try:
-                    self._step_graph.remove(path)
-                except nx.exception.NetworkXError as e:
-                    # The step might have been deleted already.
-                    msg = f'The node {path} is not in the digraph.'
-                    if e.args[0] != msg:
-                        raise e
-                del self._step_paths[path]
+        # many stores can be deleted at once, e.g. when agents divide,
+        # so the indices are searched for all of them together
+        self._pending_deletions.append(tuple(deletion))
+
+    def _flush_deletions(self) -> None:
+        """Remove the processes and steps at or below each deleted path
+        from the indices."""
+        if not self._pending_deletions:
+            return
+        # paths are dictionary keys, so they are tuples and can be
+        # looked up in the set of deleted paths directly
+        deletions = set(self._pending_deletions)
+        self._pending_deletions = []
+        deleted_processes = [
+            path for path in self.process_paths
+            if _under_paths(path, deletions)]
+        for path in deleted_processes:
+            del self.process_paths[path]
+        self._deleted_fronts.update(deleted_processes)
+
+        deleted_steps = [
+            path for path in self._step_paths
+            if _under_paths(path, deletions)]
+        for path in deleted_steps:
+            try:
+                self._step_graph.remove(path)
+            except nx.exception.NetworkXError as e:
+                # The step might have been deleted already.
+                msg = f'The node {path} is not in the digraph.'
+                if e.args[0] != msg:
+                    raise e
+            del self._step_paths[path]
+
+    def _remove_deleted_fronts(self) -> None:
+        """Remove the front entries of deleted processes.
+
+        A process that is added back at the path of a deleted process
+        keeps the deleted process's entry, and so its time.
+        """
+        if not self._deleted_fronts:
+            return
+        for path in self._deleted_fronts:
+            if path not in self.process_paths:
+                self.front.pop(path, None)
+        self._deleted_fronts.clear()
+
+    def _submit_step_update(
+            self,
+            path: HierarchyPath,
+            step: Process,
+    ) -> Tuple[Defer, Store, Optional[Future]]:
+        """Start calculating a step's update in the thread pool.
+
+        Reading the simulation state fills caches in the stores, so the
+        step's view of the state is built here on the calling thread.
+        Only the step's ``next_update`` runs in the pool.
+
+        Returns:
+            Tuple of the deferred update, the store at ``path``, and the
+            future to wait for before getting the update, or ``None`` if
+            the step does not run.
+        """
+        assert self._step_pool is not None
+        store, states = self._process_state(path)
+        if not step.update_condition(0, states):
+            return EmptyDefer(), store, None
+        update = ProcessDefer(step, path, store)
+        future = self._step_pool.submit(_invoke_process, step, 0, states)
+        return update, store, future
+
+    def _get_execution_layers(
+            self) -> Tuple[Tuple[HierarchyPath, ...], ...]:
+        """Get the step execution layers, sorting the step graph only
+        if steps have been added or removed since the last call."""
+        if self._cached_layers_version != self._step_graph.version:
+            self._cached_layers = tuple(
+                tuple(layer)
+                for layer in self._step_graph.get_execution_layers())
+            self._cached_layers_version = self._step_graph.version
+        return self._cached_layers
 
     def run_steps(self) -> None:
         """Run all the steps in the simulation."""
-        layers = self._step_graph.get_execution_layers()
-        for layer in layers:
-            deferred_updates: List[Tuple[Defer, Store]] = []
+        for layer in self._get_execution_layers():
+            deferred_updates: List[
+                Tuple[Defer, Store, Optional[Future]]] = []
             for path in layer:
                 step = self._step_paths.get(path)
                 if not step:
@@ -830,14 +1129,20 @@ class Engine:
                 #  generate_paths() add a schema attribute to the Deriver.
                 #  PyCharm's type check reports:
                 #    Type Process doesn't have expected attribute 'schema'
-                update, store = self._calculate_update(
-                    path, step, 0)
-                deferred_updates.append((update, store))
+                if self._step_pool and len(layer) > 1 and not step.parallel:
+                    deferred_updates.append(
+                        self._submit_step_update(path, step))
+                else:
+                    deferred_updates.append(
+                        (*self._calculate_update(path, step, 0), None))
 
             view_expire = False
-            for update, store in deferred_updates:
-                view_expire_update = self.apply_update(update.get(), store)
+            for update, store, future in deferred_updates:
+                if future is not None:
+                    future.result()
+                view_expire_update = self._apply_deferred(update, store)
                 view_expire = view_expire or view_expire_update
+            self._flush_deletions()
 
             if view_expire:
                 self.state.build_topology_views()
@@ -856,8 +1161,9 @@ class Engine:
         view_expire = False
         for update_tuple in update_tuples:
             update, state = update_tuple
-            view_expire_update = self.apply_update(update.get(), state)
+            view_expire_update = self._apply_deferred(update, state)
             view_expire = view_expire or view_expire_update
+        self._flush_deletions()
 
         if view_expire:
             self.state.build_topology_views()
@@ -891,13 +1197,6 @@ class Engine:
             assert len(advance['update']) == 0, \
                 f"the process at path {path} is an unapplied update"
 
-    def _remove_deleted_processes(self) -> None:
-        '''Remove deleted processes from the front.'''
-        self.front = {
-            path: progress
-            for path, progress in self.front.items()
-            if path in self.process_paths}
-
     def run_for(
             self,
             interval: float,
@@ -923,9 +1222,13 @@ class Engine:
         end_time = self.global_time + interval
         emit_time = self.global_time + self.emit_step
 
+        fronts = self.front
+        precision = self.global_time_precision
+
         while self.global_time < end_time or force_complete:
+            self._remove_deleted_fronts()
+            global_time = self.global_time
             full_step = math.inf
-            self._remove_deleted_processes()
 
             # processes at quiet paths don't meet their execution condition,
             # but still advance in time
@@ -934,14 +1237,21 @@ class Engine:
             # go through each process and find those that are able to update
             # based on their most recent update time being less than global time
             for path, process in self.process_paths.items():
-                if path not in self.front:
-                    self.front[path] = empty_front(self.global_time)
-                process_time = self.front[path]['time']
-
-                if process_time <= self.global_time:
-
-                    # get the time step
-                    store, states = self._process_state(path)
+                front = fronts.get(path)
+                if front is None:
+                    front = fronts[path] = empty_front(global_time)
+                process_time = front['time']
+
+                if process_time <= global_time:
+
+                    # get the time step. The default time step does not
+                    # depend on the state, so only view it if the process
+                    # runs
+                    store, states = None, None
+                    if (
+                            type(process).calculate_timestep
+                            is not Process.calculate_timestep):
+                        store, states = self._process_state(path)
                     process_timestep = process.calculate_timestep(states)
 
                     if force_complete:
@@ -949,11 +1259,13 @@ class Engine:
                         future = min(process_time + process_timestep, end_time)
                     else:
                         future = process_time + process_timestep
-                    if self.global_time_precision is not None:
+                    if precision is not None:
                         # set future time based on global_time_precision
-                        future = round(future, self.global_time_precision)
+                        future = round(future, precision)
 
                     if future <= end_time:
+                        if store is None or states is None:
+                            store, states = self._process_state(path)
 
                         # calculate the update for this process
                         if process.update_condition(process_timestep, states):
@@ -961,26 +1273,26 @@ class Engine:
                                 path, process, store, states, process_timestep)
 
                             # update front, to be applied at its projected time
-                            self.front[path]['time'] = future
-                            self.front[path]['update'] = update
+                            front['time'] = future
+                            front['update'] = update
 
                             # absolute timestep
-                            timestep = future - self.global_time
+                            timestep = future - global_time
                             if timestep < full_step:
                                 full_step = timestep
                         else:
                             # mark this path "quiet" so its time can be advanced
-                            self.front[path]['update'] = (EmptyDefer(), store)
+                            front['update'] = (EmptyDefer(), store)
                             quiet_paths.append(path)
                     else:
                         # absolute timestep
-                        timestep = future - self.global_time
+                        timestep = future - global_time
                         if timestep < full_step:
                             full_step = timestep
 
                 else:
                     # don't shoot past processes that didn't run this time
-                    process_delay = process_time - self.global_time
+                    process_delay = process_time - global_time
                     if process_delay < full_step:
                         full_step = process_delay
 
@@ -988,42 +1300,32 @@ class Engine:
             if full_step == math.inf:
                 # no processes ran, jump to next process
                 next_event = end_time
-                for path in self.front.keys():
-                    if self.front[path]['time'] < next_event:
-                        next_event = self.front[path]['time']
+                for advance in fronts.values():
+                    if advance['time'] < next_event:
+                        next_event = advance['time']
                 self.global_time = next_event
 
-            elif self.global_time + full_step <= end_time:
+            elif global_time + full_step <= end_time:
                 # at least one process ran within the interval
                 # increase the time, apply updates, and continue
-                self.global_time += full_step
+                global_time += full_step
+                self.global_time = global_time
 
                 # advance all quiet processes to current time
                 for quiet in quiet_paths:
-                    self.front[quiet]['time'] = self.global_time
+                    fronts[quiet]['time'] = global_time
 
                 # apply updates that are behind global time
                 updates = []
-                paths = []
-                for path, advance in self.front.items():
-                    if advance['time'] <= self.global_time \
-                            and advance['update']:
-                        new_update = advance['update']
-                        updates.append(new_update)
+                for advance in fronts.values():
+                    if advance['time'] <= global_time and advance['update']:
+                        updates.append(advance['update'])
                         advance['update'] = {}
-                        paths.append(path)
 
                 self._send_updates(updates)
 
                 # display and emit
-                if self.progress_bar:
-                    print_progress_bar(self.global_time, end_time)
-                if self.emit_step == 1:
-                    self._emit_store_data()
-                elif emit_time <= self.global_time:
-                    while emit_time <= self.global_time:
-                        self._emit_store_data()
-                        emit_time += self.emit_step
+                emit_time = self._display_and_emit(end_time, emit_time)
 
             else:
                 # all processes have run past the interval
@@ -1032,6 +1334,24 @@ class Engine:
             if force_complete and self.global_time == end_time:
                 force_complete = False
 
+        self._remove_deleted_fronts()
+
+    def _display_and_emit(self, end_time: float, emit_time: float) -> float:
+        """Show progress and emit the state if an emit is due.
+
+        Returns:
+            The time of the next emit.
+        """
+        if self.progress_bar:
+            print_progress_bar(self.global_time, end_time)
+        if self.emit_step == 1:
+            self._emit_store_data()
+        elif emit_time <= self.global_time:
+            while emit_time <= self.global_time:
+                self._emit_store_data()
+                emit_time += self.emit_step
+        return emit_time
+
     @staticmethod
     def _end_process_if_parallel(process: Process) -> None:
         if process.parallel:
@@ -1050,6 +1370,9 @@ class Engine:
             self.processes, self._end_process_if_parallel)
         apply_func_to_leaves(
             self.steps, self._end_process_if_parallel)
+        if self._step_pool:
+            self._step_pool.shutdown()
+            self._step_pool = None
         if self.profiler:
             self.profiler.disable()
             total_stats = pstats.Stats(self.profiler)
@@ -1159,10 +1482,7 @@ def _process_update(
         interval,
         states)
 
-    absolute = Defer(
-        process,
-        invert_topology,
-        (path, store.topology))
+    absolute = ProcessDefer(process, path, store)
 
     return absolute, store
 
@@ -1239,6 +1559,58 @@ def test_flow_with_valid_steps() -> None:
         },
     )
 
+
+def test_threaded_steps() -> None:
+    class CopyStep(Step):
+
+        def ports_schema(self) -> Schema:
+            return {
+                'source': {'_default': 0, '_emit': True},
+                'target': {
+                    '_default': 0, '_updater': 'set', '_emit': True},
+            }
+
+        def next_update(self, timestep: float, states: State) -> Update:
+            return {'target': states['source'] + 1}
+
+    class Counter(Process):
+
+        def ports_schema(self) -> Schema:
+            return {'count': {'_default': 0, '_emit': True}}
+
+        def next_update(self, timestep: float, states: State) -> Update:
+            return {'count': 1}
+
+    def run(step_workers: int) -> dict:
+        engine = Engine(
+            processes={'counter': Counter()},
+            steps={
+                'a': CopyStep(),
+                'b': CopyStep(),
+                'c': CopyStep(),
+            },
+            topology={
+                'counter': {'count': ('count',)},
+                'a': {'source': ('count',), 'target': ('x',)},
+                'b': {'source': ('count',), 'target': ('y',)},
+                'c': {'source': ('x',), 'target': ('z',)},
+            },
+            flow={
+                'a': [],
+                'b': [],
+                'c': [('a',)],
+            },
+            step_workers=step_workers,
+            display_info=False,
+        )
+        engine.update(3)
+        engine.end()
+        return engine.emitter.get_timeseries()
+
+    assert run(2) == run(0)
+    assert run(2)['z'] == [2, 3, 4, 5]
+
+
 def test_numpy_schema_validation() -> None:
     class ProcessA(Process):
 
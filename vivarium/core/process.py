@@ -19,7 +19,7 @@ from warnings import warn
 import pytest
 
 from vivarium.library.dict_utils import (
-    deep_merge, deep_merge_check, deep_copy_internal)
+    deep_merge, deep_merge_check, deep_copy_internal, deep_copy)
 from vivarium.library.topology import assoc_path, get_in
 from vivarium.core.types import (
     HierarchyPath, Schema, State, Update,
@@ -429,7 +429,7 @@ class Process(metaclass=abc.ABCMeta):
         Returns:
             The combined schema.
         """
-        ports = copy.deepcopy(self.ports_schema())
+        ports = deep_copy(self.ports_schema())
         deep_merge(ports, self.schema_override)
         deep_merge(ports, override)
         return ports
@@ -596,7 +596,8 @@ class Process(metaclass=abc.ABCMeta):
                 computed.
             states: The pre-update simulation state. This will take the
                 same form as the process's schema, except with a value
-                for each variable.
+                for each variable. The dictionaries are built fresh for
+                each call, so the process may modify them.
 
         Returns:
             An empty dictionary for now. This should be overridden by
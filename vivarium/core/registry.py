@@ -119,6 +119,9 @@ class Registry(object):
         """A Registry holds a collection of functions or objects."""
         self.registry = {}
         self.main_keys = []
+        #: Incremented by every call to :py:meth:`register`, so that
+        #: lookups derived from the registry know when to be rebuilt.
+        self.version = 0
 
     def register(self, key, item, alternate_keys=tuple()):
         """Add an item to the registry.
@@ -133,6 +136,7 @@ class Registry(object):
                 This may be useful if you want to be able to look up an
                 item in the registry under multiple keys.
         """
+        self.version += 1
         keys = [key]
         keys.extend(alternate_keys)
         for registry_key in keys:
@@ -10,7 +10,7 @@ a BSON-compatible form.
 import re
 import math
 import warnings
-from typing import Any, List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 from collections.abc import Callable
 
 import orjson
@@ -74,6 +74,34 @@ def serialize_value(
             f'string keys: {bad_keys}').with_traceback(e.__traceback__) from e
 
 
+# Serializers that implement can_deserialize, keyed by the version of
+# the serializer registry when the list was built.
+_DESERIALIZERS: Dict[int, List[Serializer]] = {}
+
+
+def _get_deserializers() -> List[Serializer]:
+    """Get the registered serializers that can deserialize any data.
+
+    Serializers that inherit ``Serializer.can_deserialize`` never
+    deserialize anything, so they are skipped. The list is rebuilt
+    whenever a serializer is registered.
+    """
+    registry_version = serializer_registry.version
+    deserializers = _DESERIALIZERS.get(registry_version)
+    if deserializers is None:
+        deserializers = []
+        for serializer_name in serializer_registry.list():
+            serializer = serializer_registry.access(serializer_name)
+            if (
+                    type(serializer).can_deserialize
+                    is not Serializer.can_deserialize
+                    or 'can_deserialize' in vars(serializer)):
+                deserializers.append(serializer)
+        _DESERIALIZERS.clear()
+        _DESERIALIZERS[registry_version] = deserializers
+    return deserializers
+
+
 def deserialize_value(value: Any) -> Any:
     """Find and apply the correct serializer for a value
     by calling each registered serializer's
@@ -90,11 +118,9 @@ def deserialize_value(value: Any) -> Any:
     Returns:
         Any: Deserialized data
     """
-    compatible_serializers = []
-    for serializer_name in serializer_registry.list():
-        serializer = serializer_registry.access(serializer_name)
-        if serializer.can_deserialize(value):
-            compatible_serializers.append(serializer)
+    compatible_serializers = [
+        serializer for serializer in _get_deserializers()
+        if serializer.can_deserialize(value)]
     if not compatible_serializers:
         # Most likely a built-in type with no custom serializer/deserializer
         return value
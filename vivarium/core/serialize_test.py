@@ -6,7 +6,7 @@ import numpy as np
 
 from vivarium.core.process import Process
 from vivarium.core.serialize import serialize_value, deserialize_value
-from vivarium.core.registry import Serializer
+from vivarium.core.registry import Serializer, serializer_registry
 from vivarium.library.units import units
 
 
@@ -216,5 +216,29 @@ def test_unsupported_types() -> None:
         assert str(e.__cause__) == 'Type is not JSON serializable: type'
 
 
+def test_deserializer_registration() -> None:
+    class MarkerSerializer(Serializer):
+        python_type = type(None)
+
+        def can_deserialize(self, data: Any) -> bool:
+            return data == '!marker'
+
+        def deserialize(self, data: Any) -> Any:
+            return 'deserialized marker'
+
+    assert deserialize_value('!marker') == '!marker'
+    version = serializer_registry.version
+    serializer_registry.register('marker', MarkerSerializer())
+    try:
+        assert serializer_registry.version > version
+        assert deserialize_value('!marker') == 'deserialized marker'
+    finally:
+        # leave the global registry as the other tests expect it
+        del serializer_registry.registry['marker']
+        serializer_registry.main_keys.remove('marker')
+        serializer_registry.version += 1
+    assert deserialize_value('!marker') == '!marker'
+
+
 if __name__ == '__main__':
     test_serialization_full()
@@ -7,6 +7,8 @@ The file system for storing and updating state variables during an experiment.
 """
 
 import copy
+import functools
+import itertools
 import logging as log
 from pprint import pformat
 import uuid
@@ -14,18 +16,76 @@ import warnings
 
 import numpy as np
 from pint import Unit, Quantity
-from typing import Optional
+from typing import Dict, Optional, Set
 
 from vivarium.core.registry import divider_registry, serializer_registry, updater_registry
 from vivarium.core.process import ParallelProcess, Process
-from vivarium.library.dict_utils import deep_compare, deep_merge, deep_merge_check, MULTI_UPDATE_KEY
+from vivarium.library.dict_utils import (
+    deep_compare, deep_copy_internal, deep_merge, deep_merge_check,
+    MULTI_UPDATE_KEY)
 from vivarium.library.topology import dict_to_paths
 from vivarium.core.types import Processes, Topology, State, Steps, Flow
 from vivarium.core.serialize import QuantitySerializer
 
 _EMPTY_UPDATES = None, None, None, None, None, None
+# Special keys of branch updates that change the structure of the tree
+_STRUCTURE_UPDATE_KEYS = frozenset(
+    ('_add', '_move', '_generate', '_divide', '_delete'))
 DEFAULT_SCHEMA = '_default'
 
+# Schema values of these exact types are safe to share between stores.
+_INTERNABLE_SCHEMA_TYPES = (bool, int, float, str, type(None))
+# Most distinct schemas a tree of stores shares. Schemas beyond this,
+# e.g. from defaults that differ per agent, are kept unshared.
+_MAX_INTERNED_SCHEMAS = 10000
+# Number of reads of an unchanged topology view before it is compiled.
+_COMPILE_VIEW_AFTER = 4
+
+
+class _SchemaTable:
+    """Shared instances of the schemas in one tree of stores.
+
+    Many stores are configured by identical leaf schemas like
+    ``{'_default': 0.0, '_updater': 'set'}``, and many branches (e.g.
+    the ports of each agent's processes) by identical trees of them.
+    Schemas whose values are all simple scalars or already shared
+    schemas are deduplicated, so each unique schema is held by a single
+    dictionary. The table belongs to the root of a tree, so it is freed
+    with the tree, and it holds at most ``_MAX_INTERNED_SCHEMAS``
+    schemas.
+
+    Shared schemas are referenced by the ``sources`` of many stores and
+    must not be modified in place.
+    """
+    __slots__ = ('schemas', 'ids')
+
+    def __init__(self) -> None:
+        self.schemas: Dict[frozenset, dict] = {}
+        # ids of the dictionaries in self.schemas, which hold them alive
+        self.ids: Set[int] = set()
+
+    def intern(self, schema):
+        """Get the shared instance of ``schema``. Any schema that cannot
+        be shared is returned unchanged."""
+        items = []
+        for schema_key, value in schema.items():
+            value_type = type(value)
+            if value_type is dict and id(value) in self.ids:
+                # shared schemas are equal only if they are the same object
+                value = id(value)
+            elif value_type not in _INTERNABLE_SCHEMA_TYPES:
+                return schema
+            # include the type so that e.g. 0, 0.0, and False stay distinct
+            items.append((schema_key, value_type, value))
+        key = frozenset(items)
+        interned = self.schemas.get(key)
+        if interned is None:
+            if len(self.schemas) >= _MAX_INTERNED_SCHEMAS:
+                return schema
+            interned = self.schemas[key] = schema
+            self.ids.add(id(schema))
+        return interned
+
 
 def generate_state(
         processes: Processes,
@@ -64,6 +124,70 @@ def view_values(
     return state_values
 
 
+def _view_shape(states, stores):
+    """Get the key structure of a topology view as nested tuples.
+
+    The stores in the view are appended to ``stores`` in the order they
+    are visited, and each is represented by ``None`` in the shape.
+
+    Raises:
+        TypeError: If the view has a key that cannot be written as a
+            Python literal.
+    """
+    if isinstance(states, Store):
+        stores.append(states)
+        return None
+    shape = []
+    for key, value in states.items():
+        if type(key) not in (str, int):
+            raise TypeError(f'cannot compile view key {key!r}')
+        shape.append((key, _view_shape(value, stores)))
+    return tuple(shape)
+
+
+def _view_source(shape, indices):
+    if shape is None:
+        return f's[{next(indices)}].get_value()'
+    items = ', '.join(
+        f'{key!r}: {_view_source(subshape, indices)}'
+        for key, subshape in shape)
+    return '{' + items + '}'
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_view_shape(shape):
+    source = (
+        'def view_values_compiled(s):\n'
+        f'    return {_view_source(shape, itertools.count())}\n')
+    namespace = {}
+    exec(compile(source, '<view_values>', 'exec'), namespace)  # pylint: disable=exec-used
+    return namespace['view_values_compiled']
+
+
+def compile_view_values(states):
+    """Compile a function that returns ``view_values(states)``.
+
+    The generated function builds the nested state as a single dict
+    literal with one ``get_value()`` call per store, instead of
+    recursing through ``states``. Code is generated once per distinct
+    view structure and shared by every view with that structure.
+
+    Args:
+        states: A topology view, as built by
+            :py:meth:`Store.schema_topology`.
+
+    Returns:
+        A function of no arguments that returns the current values of
+        the stores in ``states``.
+    """
+    stores = []
+    try:
+        shape = _view_shape(states, stores)
+    except TypeError:
+        return functools.partial(view_values, states)
+    return functools.partial(_compile_view_shape(shape), tuple(stores))
+
+
 def key_for_value(d, looking):
     """Get the key associated with a value in a dictionary.
 
@@ -91,13 +215,19 @@ def hierarchy_depth(hierarchy, path=()):
     """
 
     base = {}
-
-    for key, inner in hierarchy.items():
-        down = tuple(path + (key,))
-        if isinstance(inner, dict):
-            base.update(hierarchy_depth(inner, down))
-        else:
+    # walk with a stack of item iterators rather than recursing, so the
+    # paths come out in the same order without a call per nested dict
+    stack = [(tuple(path), iter(hierarchy.items()))]
+    while stack:
+        prefix, items = stack[-1]
+        for key, inner in items:
+            down = prefix + (key,)
+            if isinstance(inner, dict):
+                stack.append((down, iter(inner.items())))
+                break
             base[down] = inner
+        else:
+            stack.pop()
 
     return base
 
@@ -110,6 +240,14 @@ def _identity(y):
     return y
 
 
+def _to_units(value, to_units):
+    """Convert a quantity to ``to_units``, skipping the conversion (and
+    the new quantity it builds) when it already has those units."""
+    if value.units == to_units:
+        return value
+    return value.to(to_units)
+
+
 def topology_path(topology, path):
     '''
     get the subtopology at the path inside the given topology.
@@ -208,6 +346,24 @@ class Store:
         '_serializer',
     }
 
+    #: Incremented whenever a store is replaced or removed anywhere in
+    #: any hierarchy, which invalidates every store's path index.
+    _structure_version = 0
+    #: Incremented whenever a store is created, replaced or removed, or
+    #: a store's ``_emit`` changes, which invalidates every branch's
+    #: cached emit skeleton.
+    _emit_version = 0
+
+    # A simulation can hold many stores, so they don't get an instance
+    # __dict__.
+    __slots__ = (
+        'outer', 'inner', 'subschema', 'subtopology', 'properties',
+        'default', 'updater', 'value', 'units', 'divider', 'emit',
+        'sources', 'leaf', 'serializer', 'topology', 'topology_view',
+        'flow', '_view_values', '_port_stores', '_flat', '_flat_version',
+        '_emit_skeleton', '_schema_table',
+    )
+
     def __init__(self, config, outer=None, source=None):
         self.outer = outer
         self.inner = {}
@@ -225,12 +381,27 @@ class Store:
         self.serializer = None
         self.topology = {}
         self.topology_view = None
+        self._view_values = (None, 0, None)
+        # (structure version, result) of the last port_stores() call
+        self._port_stores = (None, None)
         # self.flow is None when this node has no flow (either because
         # it is not a Step or because it is a Step treated like a
         # Deriver) and a list when this node holds a Step with
         # dependencies. The list is empty if the Step has no
         # dependencies but should not be treated like a Deriver.
         self.flow = None
+        # Index from paths below this node to the stores they resolve
+        # to, filled in lazily by get_path().
+        self._flat = {}
+        self._flat_version = Store._structure_version
+        # (emit version, skeleton) where the skeleton is the nested
+        # empty dicts this branch emits when nothing below it is
+        # emitted, and None otherwise.
+        self._emit_skeleton = (None, None)
+        Store._emit_version += 1
+        # shared schemas for this store's sources, one table per tree
+        self._schema_table = (
+            outer._schema_table if outer is not None else _SchemaTable())
 
         self._apply_config(config, source)
 
@@ -435,6 +606,7 @@ class Store:
         topology = copy.deepcopy(self.topology)
         self.topology = insert_topology(
             topology, port_path, self.outer.path_to(target_store))
+        self._structure_changed()
 
         self.value.schema = self.value.get_schema()
         self.outer._topology_ports(
@@ -626,6 +798,7 @@ class Store:
 
         if '_topology' in config:
             self.topology = config.pop('_topology')
+            self._structure_changed()
 
         if '_flow' in config:
             flow = config.pop('_flow')
@@ -702,7 +875,9 @@ class Store:
                 self.properties,
                 config.get('_properties', {}))
 
-            self.emit = config.get('_emit', self.emit)
+            if '_emit' in config:
+                self.emit = config['_emit']
+                Store._emit_version += 1
         else:
             # We are at a branch node. Create and configure child nodes.
             if self.leaf and config:
@@ -718,6 +893,16 @@ class Store:
                 else:
                     self.inner[key]._apply_config(child, source=source)
 
+        if source:
+            if self.leaf:
+                self.sources[source] = self._schema_table.intern(
+                    self.sources[source])
+            else:
+                # share the children's schemas, which are interned first
+                self.sources[source] = self._schema_table.intern({
+                    key: self.inner[key].sources.get(source, child)
+                    for key, child in config.items()})
+
         if self.topology and not isinstance(self.value, Process):
             raise ValueError(
                 f'Attempting to create Store at {self.path_for()} '
@@ -730,28 +915,6 @@ class Store:
                 f'with flow {self.flow}, which is not allowed because '
                 f'the Store value ({self.value}) is not a Step.')
 
-    def _get_updater(self, update):
-        """Get the updater to use for an update applied to this store.
-
-        Args:
-            update: The update.
-
-        Returns:
-            If available, the updater specified in the update. If no
-            such updater is specified, return this store's default
-            updater. If necessary, retrieves updater from the registry.
-        """
-        updater = self.updater
-        if isinstance(update, dict) and '_updater' in update:
-            updater = update['_updater']
-
-        if updater == DEFAULT_SCHEMA:
-            # For all nodes, by default we use an 'accumulate' updater.
-            return updater_registry.access('accumulate')
-        elif isinstance(updater, str):
-            updater = updater_registry.access(updater)
-        return updater
-
     def _get_divider(self):
         if self.divider == DEFAULT_SCHEMA:
             if self.topology:
@@ -780,7 +943,10 @@ class Store:
             config['_divider'] = self.divider
 
         if sources and self.sources:
-            config['_sources'] = self.sources
+            # copy the schemas, which may be shared with other stores
+            config['_sources'] = {
+                source: deep_copy_internal(schema)
+                for source, schema in self.sources.items()}
 
         if self.inner:
             child_config = {
@@ -827,6 +993,16 @@ class Store:
         """
 
         if self.inner:
+            if condition is None and f is None:
+                # read plain leaves here rather than with a call each
+                value = {}
+                for key, child in self.inner.items():
+                    if child.inner or child.subschema or child.topology:
+                        value[key] = child.get_value()
+                    else:
+                        value[key] = child.value
+                return value
+
             if condition is None:
                 condition = _always_true
 
@@ -844,6 +1020,29 @@ class Store:
             return (self.value, self.topology)
         return self.value
 
+    def view_values(self):
+        """Get the values of this process's topology view.
+
+        This is equivalent to ``view_values(self.topology_view)``. Once
+        the same topology view has been read a few times, a function
+        from :py:func:`compile_view_values` is generated for it and used
+        until the view is rebuilt. Views that are rebuilt every few
+        reads (e.g. while agents divide each timestep) are never
+        compiled, since generating the function costs more than it
+        saves.
+        """
+        view, reads, assemble = self._view_values
+        if view is not self.topology_view:
+            view, reads, assemble = self.topology_view, 0, None
+        if assemble is None:
+            reads += 1
+            if reads >= _COMPILE_VIEW_AFTER:
+                assemble = compile_view_values(view)
+            self._view_values = (view, reads, assemble)
+            if assemble is None:
+                return view_values(view)
+        return assemble()
+
     def get_processes(self):
         """
         Get all processes in this store. Does not include steps.
@@ -893,7 +1092,10 @@ class Store:
         if self.inner:
             inner_topology = {}
             for key, child in self.inner.items():
-                child_topology = child.get_topology()
+                if child.inner:
+                    child_topology = child.get_topology()
+                else:
+                    child_topology = child.topology
                 if child_topology:
                     inner_topology[key] = child_topology
             if inner_topology:
@@ -946,7 +1148,10 @@ class Store:
         if self.inner:
             inner_flow = {}
             for key, child in self.inner.items():
-                child_flow = child.get_flow()
+                if child.inner:
+                    child_flow = child.get_flow()
+                else:
+                    child_flow = child.flow
                 if child_flow is not None:
                     inner_flow[key] = child_flow
             if inner_flow:
@@ -955,11 +1160,46 @@ class Store:
             return self.flow
         return None
 
+    @staticmethod
+    def _structure_changed():
+        """Invalidate the path indices after the hierarchy structure or
+        a process's topology changes such that some path may now lead to
+        a different store.
+        """
+        Store._structure_version += 1
+        Store._emit_version += 1
+
     def get_path(self, path):
         """
         Get the node at the given path relative to this node.
         """
-
+        if not path:
+            return self
+        if not isinstance(path, tuple):
+            return self._get_path(path)
+
+        if self._flat_version != Store._structure_version:
+            self._flat = {}
+            self._flat_version = Store._structure_version
+        node = self._flat.get(path)
+        if node is not None:
+            return node
+
+        # Paths that only descend through inner stores are walked
+        # directly. Paths through '..' or a process's topology are
+        # resolved recursively, and cached the same way since topology
+        # changes also invalidate the index.
+        node = self
+        for step in path:
+            child = node.inner.get(step)
+            if child is None:
+                node = self._get_path(path)
+                break
+            node = child
+        self._flat[path] = node
+        return node
+
+    def _get_path(self, path):
         if path:
             step = path[0]
             if step == '..':
@@ -968,7 +1208,7 @@ class Store:
                 child = self.inner.get(step)
 
             if child:
-                return child.get_path(path[1:])
+                return child._get_path(path[1:])
             elif isinstance(self.value, Process):
                 towards = topology_path(self.topology, path)
                 if towards:
@@ -980,6 +1220,47 @@ class Store:
                     f'{self.path_for()}')
         return self
 
+    def port_stores(self):
+        """Get the stores that the ports of this process's store lead to.
+
+        Returns:
+            A dictionary from each port to the store at the end of its
+            path, or ``None`` if some port is not connected by a plain
+            path to an existing store, or if the stores of two ports
+            overlap. The result is cached until the hierarchy structure
+            changes, so the same dictionary is returned for as long as
+            it is valid.
+        """
+        version, port_stores = self._port_stores
+        if version != Store._structure_version:
+            port_stores = self._find_port_stores()
+            self._port_stores = (Store._structure_version, port_stores)
+        return port_stores
+
+    def _find_port_stores(self):
+        port_stores = {}
+        for port, path in self.topology.items():
+            if port == '*' or not isinstance(path, tuple):
+                return None
+            node = self.outer
+            for step in path:
+                node = node.outer if step == '..' else node.inner.get(step)
+                if node is None:
+                    return None
+            port_stores[port] = node
+
+        # no port's store may be inside, or the same as, another's
+        targets = {id(node) for node in port_stores.values()}
+        if len(targets) < len(port_stores):
+            return None
+        for node in port_stores.values():
+            node = node.outer
+            while node is not None:
+                if id(node) in targets:
+                    return None
+                node = node.outer
+        return port_stores
+
     def get_paths(self, paths):
         """Get the nodes at each of the specified paths.
 
@@ -1036,9 +1317,24 @@ class Store:
         Returns:
             The value to emit, or None if nothing should be emitted.
         """
-        data = {}
         if self.inner:
+            version, skeleton = self._emit_skeleton
+            if version != Store._emit_version:
+                skeleton = self._update_emit_skeleton()
+            if skeleton is not None:
+                # nothing below is emitted, so skip walking the branch
+                return deep_copy_internal(skeleton)
+            data = {}
             for key, child in self.inner.items():
+                if not child.inner:
+                    if not child.emit:
+                        # a leaf that is not emitted, like a process
+                        continue
+                    if not (child.serializer or child.units):
+                        # a leaf whose value is emitted as is
+                        if child.value is not None:
+                            data[key] = child.value
+                        continue
                 child_data = child.emit_data()
                 if child_data is not None or child_data == 0:
                     data[key] = child_data
@@ -1046,17 +1342,40 @@ class Store:
         if self.emit:
             if self.serializer:
                 if isinstance(self.value, list) and self.units:
-                    return [self.serializer.serialize(v.to(self.units))
-                            for v in self.value]
+                    return [self.serializer.serialize(
+                        _to_units(v, self.units)) for v in self.value]
                 if self.units:
                     return self.serializer.serialize(
-                        self.value.to(self.units))
+                        _to_units(self.value, self.units))
                 return self.serializer.serialize(self.value)
             if self.units:
-                return self.value.to(self.units).magnitude
+                return _to_units(self.value, self.units).magnitude
             return self.value
         return None
 
+    def _update_emit_skeleton(self):
+        """Cache the emit skeletons of this branch and the branches below.
+
+        Returns:
+            The nested empty dicts that :py:meth:`emit_data` returns for
+            this branch if no leaf below it is emitted, or None if some
+            leaf is emitted.
+        """
+        skeleton = {}
+        for key, child in self.inner.items():
+            if child.inner:
+                child_skeleton = child._update_emit_skeleton()
+            elif child.emit:
+                child_skeleton = None
+            else:
+                continue
+            if child_skeleton is None:
+                skeleton = None
+            elif skeleton is not None:
+                skeleton[key] = child_skeleton
+        self._emit_skeleton = (Store._emit_version, skeleton)
+        return skeleton
+
     def set_emit_values(self, paths=None, emit=False):
         """
         Turn on/off emits for all inner nodes of the list of paths.
@@ -1078,6 +1397,7 @@ class Store:
                 child.set_emit_value(emit=emit)
         else:
             self.emit = emit
+            Store._emit_version += 1
 
     def recursive_end_process(self, value):
         if isinstance(value.value, ParallelProcess):
@@ -1096,6 +1416,7 @@ class Store:
         if not path:
             self.inner = {}
             self.value = None
+            self._structure_changed()
             return self
         target = self.get_path(path[:-1])
         remove = path[-1]
@@ -1104,6 +1425,7 @@ class Store:
             # End any parallel processes to be deleted
             self.recursive_end_process(target.inner[remove])
             del target.inner[remove]
+            self._structure_changed()
             return lost
         return None
 
@@ -1539,68 +1861,74 @@ class Store:
 
         if self.inner or self.subschema:
             # Branch update: this node has an inner
+            if not update:
+                # nothing to apply below this node
+                return [], [], [], [], [], False
+
             process_updates = []
             step_updates = []
             flow_updates = []
             topology_updates = []
             deletions = []
 
-            update = dict(update)  # avoid mutating the caller's dict
-
-            add_entries = update.pop('_add', None)
-            if add_entries is not None:
-                # add a list of sub-states
-                for added in add_entries:
-                    self.add(added)
-                view_expire = True
+            delete_keys = None
+            if not update.keys().isdisjoint(_STRUCTURE_UPDATE_KEYS):
+                update = dict(update)  # avoid mutating the caller's dict
 
-            move_entries = update.pop('_move', None)
-            if move_entries is not None:
-                # move nodes from source to target path
-                for move in move_entries:
-                    (
-                        move_processes, move_step, move_flow,
-                        move_topology, move_deletions
-                    ) = self.move(move, state)
-                    process_updates.extend(move_processes)
-                    step_updates.extend(move_step)
-                    flow_updates.extend(move_flow)
-                    topology_updates.extend(move_topology)
-                    deletions.extend(move_deletions)
+                add_entries = update.pop('_add', None)
+                if add_entries is not None:
+                    # add a list of sub-states
+                    for added in add_entries:
+                        self.add(added)
                     view_expire = True
 
-            generate_entries = update.pop('_generate', None)
-            if generate_entries is not None:
-                # generate a list of new processes
-                for generate in generate_entries:
+                move_entries = update.pop('_move', None)
+                if move_entries is not None:
+                    # move nodes from source to target path
+                    for move in move_entries:
+                        (
+                            move_processes, move_step, move_flow,
+                            move_topology, move_deletions
+                        ) = self.move(move, state)
+                        process_updates.extend(move_processes)
+                        step_updates.extend(move_step)
+                        flow_updates.extend(move_flow)
+                        topology_updates.extend(move_topology)
+                        deletions.extend(move_deletions)
+                        view_expire = True
+
+                generate_entries = update.pop('_generate', None)
+                if generate_entries is not None:
+                    # generate a list of new processes
+                    for generate in generate_entries:
+                        (
+                            insert_processes, insert_steps, insert_flows,
+                            insert_topology
+                        ) = self.insert(generate)
+                        process_updates.extend(insert_processes)
+                        step_updates.extend(insert_steps)
+                        flow_updates.extend(insert_flows)
+                        topology_updates.extend(insert_topology)
+                        view_expire = True
+
+                divide = update.pop('_divide', None)
+                if divide is not None:
                     (
-                        insert_processes, insert_steps, insert_flows,
-                        insert_topology
-                    ) = self.insert(generate)
-                    process_updates.extend(insert_processes)
-                    step_updates.extend(insert_steps)
-                    flow_updates.extend(insert_flows)
-                    topology_updates.extend(insert_topology)
+                        divide_processes, divide_steps, divide_flow,
+                        divide_topology, divide_deletions
+                    ) = self.divide(divide)
+                    process_updates.extend(divide_processes)
+                    step_updates.extend(divide_steps)
+                    flow_updates.extend(divide_flow)
+                    topology_updates.extend(divide_topology)
+                    deletions.extend(divide_deletions)
                     view_expire = True
 
-            divide = update.pop('_divide', None)
-            if divide is not None:
-                (
-                    divide_processes, divide_steps, divide_flow,
-                    divide_topology, divide_deletions
-                ) = self.divide(divide)
-                process_updates.extend(divide_processes)
-                step_updates.extend(divide_steps)
-                flow_updates.extend(divide_flow)
-                topology_updates.extend(divide_topology)
-                deletions.extend(divide_deletions)
-                view_expire = True
-
-            delete_keys = update.pop('_delete', None)
+                delete_keys = update.pop('_delete', None)
 
             for key, value in update.items():
-                if key in self.inner:
-                    inner = self.inner[key]
+                inner = self.inner.get(key)
+                if inner is not None:
                     (
                         inner_topology, inner_processes, inner_steps,
                         inner_flows, inner_deletions, inner_view_expire
@@ -1633,20 +1961,27 @@ class Store:
 
         # Leaf update: this node has no inner
 
-        updater = self._get_updater(update)
+        # an updater specified in the update overrides the store's own
+        updater = self.updater
+        if isinstance(update, dict):
+            if '_updater' in update:
+                updater = update['_updater']
 
-        if isinstance(update, dict) and '_reduce' in update:
-            reduction = update['_reduce']
-            top = self.get_path(reduction.get('from'))
-            update = top._reduce(
-                reduction['reducer'],
-                initial=reduction['initial'])
+            if '_reduce' in update:
+                reduction = update['_reduce']
+                top = self.get_path(reduction.get('from'))
+                update = top._reduce(
+                    reduction['reducer'],
+                    initial=reduction['initial'])
 
-        if isinstance(update, dict) and \
-                self.schema_keys & set(update.keys()):
-            if '_updater' in update:
+            if isinstance(update, dict) and '_updater' in update:
                 update = update.get('_value', self.default)
 
+        if isinstance(updater, str):
+            # by default, stores use the 'accumulate' updater
+            updater = updater_registry.access(
+                'accumulate' if updater == DEFAULT_SCHEMA else updater)
+
         try:
             self.value = updater(self.value, update)
         except:
@@ -1661,9 +1996,10 @@ class Store:
                     f"with value {self.value} for update {pformat(update)}")
         if self.units:
             if isinstance(self.value, list):
-                self.value = [v.to(self.units) for v in self.value]
+                self.value = [
+                    _to_units(v, self.units) for v in self.value]
             else:
-                self.value = self.value.to(self.units)
+                self.value = _to_units(self.value, self.units)
 
         return _EMPTY_UPDATES
 
@@ -1672,8 +2008,9 @@ class Store:
         Get the value of an inner state
         """
 
-        if key in self.inner:
-            return self.inner[key].get_value()
+        inner = self.inner.get(key)
+        if inner is not None:
+            return inner.get_value()
         return None
 
     def topology_state(self, topology):
@@ -1784,6 +2121,7 @@ class Store:
         else:
             node.outer = target
             target.inner.update({path[-1]: node})
+            self._structure_changed()
         return target
 
     def outer_path(self, path, source=None):
@@ -1995,6 +2333,8 @@ class Store:
                     schema['_flow'] = subflow
                 process_state = Store(schema, outer=self)
 
+                if key in self.inner:
+                    self._structure_changed()
                 self.inner[key] = process_state
 
                 subprocess.schema = subprocess.get_schema()
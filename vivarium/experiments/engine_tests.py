@@ -1,12 +1,18 @@
 import random
+import time as clock
 import logging as log
+from unittest import mock
 from typing import Optional, Union, Dict, Any, cast, List
 
+import numpy as np
+import pytest
+
 from vivarium.composites.toys import (
     PoQo, Sine, ToyDivider, ToyTransport, ToyEnvironment, ToyProcess,
     Proton, Electron, MoveProcess)
 from vivarium.core.composer import Composer, Composite
-from vivarium.core.engine import Engine, pf, pp, _StepGraph
+from vivarium.core.engine import (
+    Engine, ResolvedDefer, pf, pp, _StepGraph)
 from vivarium.core.process import Process, Step, Deriver
 from vivarium.core.store import Store, hierarchy_depth
 from vivarium.core.types import (
@@ -438,10 +444,13 @@ def test_depth() -> None:
 
 def test_sine() -> None:
     sine = Sine()
-    print(sine.next_update(0.25 / 440.0, {
+    update = sine.next_update(0.25 / 440.0, {
         'frequency': 440.0,
         'amplitude': 0.1,
-        'phase': 1.5}))
+        'phase': 1.5})
+    print(update)
+    assert update['phase'] == pytest.approx(0.25)
+    assert update['signal'] == pytest.approx(-0.1)
 
 
 def test_units() -> None:
@@ -536,6 +545,12 @@ def test_units() -> None:
     print('QUERY DATA')
     pp(query_data)
 
+    # millimeter updates are converted to the store's micrometers
+    a_store = exp.state.get_path(('aaa', 'a'))
+    assert str(a_store.get_value().units) == 'micrometer'
+    assert a_store.get_value().magnitude == pytest.approx(5005)
+    assert data_unitless[5.0]['aaa']['a'] == pytest.approx(5005)
+
 
 def test_custom_divider() -> None:
     """ToyDividerProcess has a custom `split_divider`"""
@@ -622,10 +637,40 @@ class TestStepGraph:
 
         assert not layers
 
+    @staticmethod
+    def test_step_graph_cycle() -> None:
+        tg = _StepGraph()
+        tg.add(('a',), [])
+        tg.add(('b',), [('a',)])
+        tg.add(('c',), [('b',)])
+        with pytest.raises(ValueError, match='must be a DAG'):
+            tg.add(('a',), [('c',)])
+        with pytest.raises(ValueError, match='must be a DAG'):
+            tg.add(('d',), [('d',)])
+        with pytest.raises(ValueError, match='overlapping'):
+            tg.add_sequential(('b',))
+
+    @staticmethod
+    def test_step_graph_version() -> None:
+        tg = _StepGraph()
+        version = tg.version
+        tg.add(('a',), [])
+        tg.add_sequential(('b',))
+        assert tg.version == version + 2
+        _ = tg.get_execution_layers()
+        assert tg.version == version + 2
+        tg.remove(('b',))
+        tg.remove(('a',))
+        assert tg.version == version + 4
+
 
 def test_runtime_order() -> None:
     class RuntimeOrderProcess(Process):
 
+        def __init__(self, parameters: Optional[dict] = None) -> None:
+            super().__init__(parameters)
+            self.execution_log = self.parameters['execution_log']
+
         def ports_schema(self) -> Schema:
             return {
                 'store': {
@@ -637,11 +682,15 @@ def test_runtime_order() -> None:
 
         def next_update(self, timestep: float, states: State) -> Update:
             _ = states
-            self.parameters['execution_log'].append(self.name)
+            self.execution_log.append(self.name)
             return {}
 
     class RuntimeOrderStep(Step):
 
+        def __init__(self, parameters: Optional[dict] = None) -> None:
+            super().__init__(parameters)
+            self.execution_log = self.parameters['execution_log']
+
         def ports_schema(self) -> Schema:
             return {
                 'store': {
@@ -653,11 +702,15 @@ def test_runtime_order() -> None:
 
         def next_update(self, timestep: float, states: State) -> Update:
             _ = states
-            self.parameters['execution_log'].append(self.name)
+            self.execution_log.append(self.name)
             return {}
 
     class RuntimeOrderDeriver(Deriver):
 
+        def __init__(self, parameters: Optional[dict] = None) -> None:
+            super().__init__(parameters)
+            self.execution_log = self.parameters['execution_log']
+
         def ports_schema(self) -> Schema:
             return {
                 'store': {
@@ -669,7 +722,7 @@ def test_runtime_order() -> None:
 
         def next_update(self, timestep: float, states: State) -> Update:
             _ = states
-            self.parameters['execution_log'].append(self.name)
+            self.execution_log.append(self.name)
             return {}
 
     class RuntimeOrderComposer(Composer):
@@ -817,10 +870,10 @@ def test_glob_schema() -> None:
         topology=composite.topology)
     experiment.update(10)
 
-    # declare processes in reverse order
+    # declare the same (stateless) processes in reverse order
     processes_reverse = {
-        'environment': ToyEnvironment(),
-        'agents': {'0': {'transport': ToyTransport()}}}
+        'environment': composite.processes['environment'],
+        'agents': composite.processes['agents']}
 
     experiment_reverse = Engine(
         processes=processes_reverse,
@@ -883,8 +936,21 @@ def test_environment_view_with_division() -> None:
         else:
             once_different = False
 
+    # divided mothers' processes no longer have a place in the front
+    assert experiment.front.keys() == experiment.process_paths.keys()
+
+
+def random_ids(rng: np.random.Generator, n: int) -> List[str]:
+    """Draw ``n`` random store ids in a single vectorized call."""
+    return rng.integers(
+        0, 2**63, size=n, dtype=np.uint64).astype(str).tolist()
+
 
 class AddDelete(Process):
+    def __init__(self, parameters: Optional[dict] = None) -> None:
+        super().__init__(parameters)
+        self.rng = np.random.default_rng()
+
     def ports_schema(self) -> Schema:
         return {
             'sub_stores': {
@@ -901,21 +967,21 @@ class AddDelete(Process):
 
     def next_update(
             self, timestep: Union[float, int], states: State) -> Update:
-        sub_stores = set(states['sub_stores'].keys())
-        expected = set(states['expected'])
-        assert sub_stores == expected, "stores don't match expected"
+        # compare the keys view directly rather than building a set
+        sub_stores = states['sub_stores'].keys()
+        assert sub_stores == set(states['expected']), \
+            "stores don't match expected"
 
         # delete current stores, and add the same number of stores
-        sub_stores_update: dict = {
-            '_delete': [],
-            '_add': []}
-        new_sub_stores = []
-        for store_id in sub_stores:
-            sub_stores_update['_delete'].append(store_id)
-            new_id = str(random.randint(0, 2 ** 63))
-            new_sub_stores.append(new_id)
-            new_store = {'key': new_id, 'state': 1}
-            sub_stores_update['_add'].append(new_store)
+        deletes: List[str] = []
+        adds: List[dict] = []
+        sub_stores_update = {
+            '_delete': deletes,
+            '_add': adds}
+        new_sub_stores = random_ids(self.rng, len(sub_stores))
+        for store_id, new_id in zip(sub_stores, new_sub_stores):
+            deletes.append(store_id)
+            adds.append({'key': new_id, 'state': 1})
 
         return {
             'sub_stores': sub_stores_update,
@@ -931,8 +997,7 @@ def test_add_delete() -> None:
 
     # initial state
     n_initial = 10
-    initial_substores = [
-        str(random.randint(0, 2**63)) for _ in range(n_initial)]
+    initial_substores = random_ids(np.random.default_rng(), n_initial)
     initial_state = {
         'sub_stores': {
             sub_store: 1
@@ -1011,9 +1076,27 @@ def test_hyperdivision(profile: bool = True) -> None:
         steps=composite.steps,
         flow=composite.flow,
         topology=composite.topology,
-        profile=profile,
     )
-    experiment.update(total_time)
+
+    # time only view_values, since profiling everything would slow
+    # down the whole simulation
+    view_values_time = 0.0
+    store_view_values = Store.view_values
+
+    def timed_view_values(store: Store) -> State:
+        nonlocal view_values_time
+        start = clock.perf_counter()
+        states = store_view_values(store)
+        view_values_time += clock.perf_counter() - start
+        return states
+
+    start = clock.perf_counter()
+    if profile:
+        with mock.patch.object(Store, 'view_values', timed_view_values):
+            experiment.update(total_time)
+    else:
+        experiment.update(total_time)
+    total_runtime = clock.perf_counter() - start
     experiment.end()
     data = experiment.emitter.get_data()
 
@@ -1022,17 +1105,9 @@ def test_hyperdivision(profile: bool = True) -> None:
     assert len(data[total_time]['agents'].keys()) > n_agents
 
     if profile:
-        stats = experiment.stats
-        stats.strip_dirs().sort_stats(  # type: ignore
-            'cumulative', 'cumtime').print_stats(20)
-
         # make sure view_values is fast
-        stats_view_values = stats.get_print_list(  # type: ignore
-            ('view_values',))[1]
-        view_values_times = stats.stats[  # type: ignore
-            stats_view_values[0]][3]
-        total_runtime = stats.total_tt  # type: ignore
-        assert view_values_times < 0.1 * total_runtime
+        print(f"view_values: {view_values_time:.3f} of {total_runtime:.3f} s")
+        assert view_values_time < 0.1 * total_runtime
 
 def test_output_port() -> None:
     a_default = 1
@@ -1280,6 +1355,91 @@ def test_move_update() -> None:
         'carried its internal states generated by ToyProcess'
 
 
+def test_null_emitter() -> None:
+    network = MergePort({}).generate()
+    exp = Engine(
+        processes=network['processes'],
+        topology=network['topology'],
+        emitter={'type': 'null'})
+
+    def fail_emit_data(_: Store) -> None:
+        raise AssertionError('collected data for the null emitter')
+    # the null emitter discards everything, so nothing is collected
+    with mock.patch.object(Store, 'emit_data', fail_emit_data):
+        exp.update(2)
+    assert exp.state.get_value()['aaa']['a'] == 6
+
+
+def test_waiting_process_state() -> None:
+    exp = Engine(
+        processes={'transport': ToyTransport({'time_step': 3})},
+        topology={'transport': {
+            'internal': ('internal',), 'external': ('external',)}},
+        initial_state={'external': {'GLC': 10.0}},
+        emitter={'type': 'null'})
+
+    views = []
+    view_values = Store.view_values
+
+    def count_view_values(store: Store) -> Any:
+        views.append(store.path_for())
+        return view_values(store)
+
+    # a process waiting out its time step should not view its state
+    with mock.patch.object(Store, 'view_values', count_view_values):
+        exp.run_for(1)
+        exp.run_for(1)
+        exp.run_for(1, force_complete=True)
+    assert exp.global_time == 3
+    assert len(views) == 1  # only when the process runs
+    assert exp.state.get_value()['internal']['GLC'] == 2
+
+
+def test_regenerate_deleted_process() -> None:
+    def transport_at(agent_id: str) -> Dict[str, Any]:
+        return {
+            'key': agent_id,
+            'processes': {'transport': ToyTransport()},
+            'topology': {'transport': {
+                'internal': ('internal',), 'external': ('external',)}},
+            'initial_state': {}}
+
+    agents = [transport_at(agent_id) for agent_id in ('0', '1')]
+    exp = Engine(
+        processes={'agents': {
+            agent['key']: agent['processes'] for agent in agents}},
+        topology={'agents': {
+            agent['key']: agent['topology'] for agent in agents}},
+        emitter={'type': 'null'})
+
+    # the deletion's indices are cleaned up after the second update
+    # has already put a new process at the same path
+    exp._send_updates([  # pylint: disable=protected-access
+        (ResolvedDefer({'agents': {'_delete': ['1']}}), exp.state),
+        (ResolvedDefer({'agents': {'_generate': [transport_at('1')]}}),
+         exp.state),
+        (ResolvedDefer({'agents': {'_delete': ['1']}}), exp.state),
+        (ResolvedDefer({'agents': {'_generate': [transport_at('2')]}}),
+         exp.state),
+    ])
+    assert set(exp.process_paths) == {
+        ('agents', '0', 'transport'), ('agents', '2', 'transport')}
+    exp.update(1)
+
+    # a process added back at the path of a deleted one keeps its
+    # place in the front, and so its time
+    path = ('agents', '0', 'transport')
+    front = exp.front[path]
+    exp._send_updates([  # pylint: disable=protected-access
+        (ResolvedDefer({'agents': {'_delete': ['0']}}), exp.state),
+        (ResolvedDefer({'agents': {'_generate': [transport_at('0')]}}),
+         exp.state),
+    ])
+    exp.run_for(0)
+    assert exp.front[path] is front
+    assert exp.front.keys() == exp.process_paths.keys()
+    exp.update(1)
+
 
 engine_tests = {
     '0': test_recursive_store,
@@ -1305,6 +1465,9 @@ engine_tests = {
     '20': test_add_new_state,
     '21': test_floating_point_timesteps,
     '22': test_move_update,
+    '23': test_null_emitter,
+    '24': test_waiting_process_state,
+    '25': test_regenerate_deleted_process,
 }
 
 
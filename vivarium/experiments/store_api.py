@@ -4,7 +4,7 @@ import pytest
 from vivarium.composites.toys import Qo, ToyProcess, ToyComposer
 from vivarium.core.process import Process
 from vivarium.core.engine import Engine
-from vivarium.core.store import Store
+from vivarium.core.store import Store, compile_view_values, view_values
 from vivarium.core.control import run_library_cli
 
 
@@ -267,6 +267,128 @@ def test_add_store() -> None:
             'state': {'var_c': 100}})
 
 
+def test_get_path_after_delete() -> None:
+    store = Store({})
+    store.create(['top', 'store1', 'X'])
+    old = store.get_path(('top', 'store1', 'X'))
+    assert store.get_path(('top', 'store1', 'X')) is old
+
+    # replace the deleted subtree; cached paths must not resolve to
+    # the old stores
+    store.apply_update({'top': {'_delete': ['store1']}})
+    store.create(['top', 'store1', 'X'])
+    new = store.get_path(('top', 'store1', 'X'))
+    assert new is not old
+    assert new.outer is store.get_path(('top', 'store1'))
+
+
+def test_shared_leaf_sources() -> None:
+    store = Store({})
+    store["p1"] = ToyProcess({'name': 'p1'})
+    store["p2"] = ToyProcess({'name': 'p2'})
+
+    # both processes declare the same schema for this variable
+    sources = store['port1', 'var_a'].sources
+    assert sources[('p1',)] == sources[('p2',)]
+    assert sources[('p1',)] is sources[('p2',)]
+    # as are the schemas of the ports above them
+    port_sources = store['port1'].sources
+    assert port_sources[('p1',)] is port_sources[('p2',)]
+    assert port_sources[('p1',)]['var_a'] is sources[('p1',)]
+
+    # the shared schemas are copied for callers
+    config_sources = store['port1', 'var_a'].get_config(
+        sources=True)['_sources']
+    config_sources[('p1',)]['_default'] = 'changed'
+    assert sources[('p2',)]['_default'] != 'changed'
+
+    # schemas are only shared within a tree of stores
+    other = Store({})
+    other["p1"] = ToyProcess({'name': 'p1'})
+    assert other['port1', 'var_a'].sources[('p1',)] == sources[('p1',)]
+    assert other['port1', 'var_a'].sources[('p1',)] is not sources[('p1',)]
+
+
+def test_compiled_view_values() -> None:
+    store = get_toy_store()
+    process_store = store['process1']
+    view = process_store.topology_view
+    assemble = compile_view_values(view)
+    assert assemble() == view_values(view)
+
+    # compiled views read the current values
+    store['process1']['port1']['var_a'] = 5
+    assert assemble()['port1']['var_a'] == 5
+    for _ in range(5):
+        assert process_store.view_values() == view_values(view)
+
+    # keys that are not literals fall back to view_values
+    odd_view = {('a',): view['port1']}
+    assert compile_view_values(odd_view)() == view_values(odd_view)
+
+
+def test_empty_update() -> None:
+    store = get_toy_store()
+    before = store.get_value()
+    assert store.apply_update({}) == ([], [], [], [], [], False)
+    assert store.apply_update({'store_A': {}})[-1] is False
+    assert store.get_value() == before
+
+    # an empty dict is still a value for leaves with the set updater
+    store.create(['dict_leaf'], {'a': 1}, _updater='set')
+    store.apply_update({'dict_leaf': {}})
+    assert store['dict_leaf'].value == {}
+
+
+def test_get_path_through_ports() -> None:
+    store = cast(Store, test_insert_process(return_value=True))
+    assert store['process2', 'port2', 'var_a'] is store['store_C', 'var_a']
+    # rewiring the port redirects paths through it
+    store['process2'].connect('port2', store['store_A'])
+    assert store['process2', 'port2', 'var_a'] is store['store_A', 'var_a']
+    assert store['process1', 'port1', '..'] is store
+
+
+def test_view_values_are_fresh() -> None:
+    store = get_toy_store()
+    process_store = store['process1']
+    for _ in range(5):
+        states = process_store.view_values()
+        # processes may modify the states they are given
+        states['port1']['var_a'] = 'modified'
+        assert store['process1']['port1']['var_a'].value != 'modified'
+        assert process_store.view_values() is not states
+
+
+def test_port_stores() -> None:
+    store = cast(Store, test_insert_process(return_value=True))
+    port_stores = store['process1'].port_stores()
+    assert port_stores == {
+        'port1': store['store_A'], 'port2': store['store_B']}
+    assert store['process1'].port_stores() is port_stores
+    # nested topologies are not resolved port by port
+    assert store['process3'].port_stores() is None
+    # neither are ports that share stores
+    store['process1'].connect('port2', store['store_A'])
+    assert store['process1'].port_stores() is None
+
+
+def test_emit_skeleton() -> None:
+    store = Store({
+        'a': {'b': {'c': {'_value': 1}}, 'd': {'_value': 2}}})
+    emitted = store.emit_data()
+    assert emitted == {'a': {'b': {}}}
+    # emits of a branch that emits nothing are fresh dicts
+    emitted['a']['b']['x'] = 1
+    assert store.emit_data() == {'a': {'b': {}}}
+    # turning on an emit is seen below a cached branch
+    store.set_emit_value(path=('a', 'b', 'c'), emit=True)
+    assert store.emit_data() == {'a': {'b': {'c': 1}}}
+    # as is adding an emitted store
+    store.create(('a', 'e'), 3, _emit=True)
+    assert store.emit_data() == {'a': {'b': {'c': 1}, 'e': 3}}
+
+
 test_library = {
     '1': test_insert_process,
     '2': test_rewire_ports,
@@ -282,6 +404,14 @@ test_library = {
     '12': test_add_store,
     '13': test_run_inserted_store,
     '14': test_run_rewired_store,
+    '15': test_get_path_after_delete,
+    '16': test_shared_leaf_sources,
+    '17': test_compiled_view_values,
+    '18': test_empty_update,
+    '19': test_view_values_are_fresh,
+    '20': test_get_path_through_ports,
+    '21': test_port_stores,
+    '22': test_emit_skeleton,
 }
 
 
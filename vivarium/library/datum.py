@@ -3,10 +3,10 @@
 Datum
 =====
 '''
-import copy
-
 from typing import Any, Callable, Dict
 
+from vivarium.library.dict_utils import deep_copy
+
 
 class Datum(dict):
     '''
@@ -29,7 +29,7 @@ class Datum(dict):
     def __init__(self, config):
         defaults = {
             key: value() if callable(value) else value
-            for key, value in copy.deepcopy(self.defaults).items()}
+            for key, value in deep_copy(self.defaults).items()}
 
         super().__init__(defaults)
         self.update(config)
@@ -1,14 +1,12 @@
 
 import collections.abc
 import copy
-from functools import reduce
-import operator
-import traceback
+import functools
 from typing import Optional, Any, Callable
 import warnings
 
 import numpy as np
-from vivarium.library.units import Quantity
+from vivarium.library.units import Quantity, units
 
 
 MULTI_UPDATE_KEY = '_multi_update'
@@ -18,8 +16,11 @@ tuple_separator = '___'
 
 def merge_dicts(dicts):
     merge = {}
+    # dict.update copies each dict in C; a comprehension over the items
+    # or dict(ChainMap(...)) is slower
+    update = merge.update
     for d in dicts:
-        merge.update(d)
+        update(d)
     return merge
 
 
@@ -40,12 +41,15 @@ def deep_compare(dct_1, dct_2, path=tuple()):
         ValueError: Raised when conflicting values are found between
             ``dct_1`` and ``dct_2``
     """
-    key_diff = dct_1.keys() ^ dct_2.keys()
-    if len(key_diff) > 0:
+    if dct_1.keys() != dct_2.keys():
+        key_diff = dct_1.keys() ^ dct_2.keys()
         warnings.warn(f'Unshared keys at {path}: {key_diff}')
         return False
     for key, val_1 in dct_1.items():
         val_2 = dct_2[key]
+        if val_1 is val_2:
+            # shared values, like interned schemas, are equal
+            continue
         if isinstance(val_1, dict) and isinstance(val_2, dict):
             if not deep_compare(val_1, val_2, path + (key,)):
                 return False
@@ -60,6 +64,14 @@ def deep_compare(dct_1, dct_2, path=tuple()):
     return True
 
 
+def _is_mapping(value):
+    """Check for a mapping, testing for the usual ``dict`` first since
+    checks against the ``Mapping`` ABC are slower. Callers on hot paths
+    check ``type(value) is dict`` inline before calling this."""
+    return isinstance(value, dict) or isinstance(
+        value, collections.abc.Mapping)
+
+
 def deep_merge_check(dct, merge_dct, check_equality=False, path=tuple()):
     """Recursively merge dictionaries with checks to avoid overwriting.
 
@@ -83,22 +95,32 @@ def deep_merge_check(dct, merge_dct, check_equality=False, path=tuple()):
         ValueError: Raised when conflicting values are found between
             ``dct`` and ``merge_dct``.
     """
-    for k in merge_dct:
-        if (k in dct and isinstance(dct[k], dict)
-                and isinstance(merge_dct[k], collections.abc.Mapping)):
-            deep_merge_check(dct[k], merge_dct[k], check_equality, path + (k,))
-        elif k in dct and not check_equality and (dct[k] is not merge_dct[k]):
+    if not merge_dct:
+        return dct
+    if not dct:
+        # there is nothing to merge with, so insert every key at once
+        dct.update(merge_dct)
+        return dct
+    for k, v in merge_dct.items():
+        if k not in dct:
+            dct[k] = v
+            continue
+        existing = dct[k]
+        if isinstance(existing, dict) and (
+                type(v) is dict or _is_mapping(v)):
+            deep_merge_check(existing, v, check_equality, path + (k,))
+        elif not check_equality and (existing is not v):
             raise ValueError(
                 f'Failure to deep-merge dictionaries at path {path + (k,)}: '
-                f'{dct[k]} IS NOT {merge_dct[k]}'
+                f'{existing} IS NOT {v}'
             )
-        elif k in dct and check_equality and (dct[k] != merge_dct[k]):
+        elif check_equality and (existing != v):
             raise ValueError(
                 f'Failure to deep-merge dictionaries at path {path + (k,)}: '
-                f'{dct[k]} DOES NOT EQUAL {merge_dct[k]}'
+                f'{existing} DOES NOT EQUAL {v}'
             )
         else:
-            dct[k] = merge_dct[k]
+            dct[k] = v
     return dct
 
 
@@ -109,16 +131,26 @@ def deep_merge_combine_lists(dct, merge_dct):
     This mutates dct - the contents of merge_dct are added to dct (which is also returned).
     If you want to keep dct you could call it like deep_merge_combine_lists(copy.deepcopy(dct), merge_dct)
     """
+    if not merge_dct:
+        return dct
+    if not dct:
+        # there is nothing to merge with, so insert every key at once
+        dct.update(merge_dct)
+        return dct
     for k, v in merge_dct.items():
-        if (k in dct and isinstance(dct[k], dict)
-                and isinstance(merge_dct[k], collections.abc.Mapping)):
-            deep_merge_combine_lists(dct[k], merge_dct[k])
-        elif k in dct and isinstance(dct[k], list) and isinstance(v, list):
+        if k not in dct:
+            dct[k] = v
+            continue
+        existing = dct[k]
+        if isinstance(existing, dict) and (
+                type(v) is dict or _is_mapping(v)):
+            deep_merge_combine_lists(existing, v)
+        elif isinstance(existing, list) and isinstance(v, list):
             for i in v:
-                if i not in dct[k]:
-                    dct[k].append(i)
+                if i not in existing:
+                    existing.append(i)
         else:
-            dct[k] = merge_dct[k]
+            dct[k] = v
     return dct
 
 
@@ -131,34 +163,43 @@ def deep_merge_multi_update(dct, merge_dct):
         dct = {}
     if merge_dct is None:
         merge_dct = {}
+    return _deep_merge_multi_update(dct, merge_dct)
+
+
+def _deep_merge_multi_update(dct, merge_dct):
+    """:py:func:`deep_merge_multi_update` for arguments that are known
+    not to be ``None``."""
+    if not merge_dct:
+        return dct
+    if not dct:
+        # there is nothing to merge with, so insert every key at once
+        dct.update(merge_dct)
+        return dct
     for k, v in merge_dct.items():
-        if (k in dct and isinstance(dct[k], dict)
-                and isinstance(merge_dct[k], collections.abc.Mapping)):
-            deep_merge_multi_update(dct[k], merge_dct[k])
-        elif k in dct:
-            # put values together in a list under '_multi_update' key
-            if isinstance(dct[k], dict) and MULTI_UPDATE_KEY in dct[k]:
-                dct[k]['_multi_update'].append(merge_dct[k])
-            else:
-                dct[k] = {
-                    '_multi_update': [
-                        dct[k], merge_dct[k]]}
+        if k not in dct:
+            dct[k] = v
+            continue
+        existing = dct[k]
+        if isinstance(existing, dict) and (
+                type(v) is dict or _is_mapping(v)):
+            _deep_merge_multi_update(existing, v)
+        # put values together in a list under '_multi_update' key
+        elif isinstance(existing, dict) and MULTI_UPDATE_KEY in existing:
+            existing['_multi_update'].append(v)
         else:
-            dct[k] = merge_dct[k]
+            dct[k] = {
+                '_multi_update': [
+                    existing, v]}
     return dct
 
 
 def remove_multi_update(d):
-    new = {}
-    for k, v in d.items():
-        if isinstance(v, dict):
-            if '_multi_update' in v:
-                new[k] = v['_multi_update'][0]
-            else:
-                new[k] = remove_multi_update(v)
-        else:
-            new[k] = v
-    return new
+    return {
+        k: (
+            (v[MULTI_UPDATE_KEY][0] if MULTI_UPDATE_KEY in v
+             else remove_multi_update(v))
+            if isinstance(v, dict) else v)
+        for k, v in d.items()}
 
 
 def deep_merge(dct, merge_dct):
@@ -171,20 +212,62 @@ def deep_merge(dct, merge_dct):
         dct = {}
     if merge_dct is None:
         merge_dct = {}
+    return _deep_merge(dct, merge_dct)
+
+
+def _deep_merge(dct, merge_dct):
+    """:py:func:`deep_merge` for arguments that are known not to be
+    ``None``."""
+    if not merge_dct:
+        return dct
+    if not dct:
+        # there is nothing to merge with, so insert every key at once
+        dct.update(merge_dct)
+        return dct
     for k, v in merge_dct.items():
-        if (k in dct and isinstance(dct[k], dict)
-                and isinstance(merge_dct[k], collections.abc.Mapping)):
-            deep_merge(dct[k], merge_dct[k])
-        else:
-            dct[k] = merge_dct[k]
+        if k in dct:
+            existing = dct[k]
+            if isinstance(existing, dict) and (
+                    type(v) is dict or _is_mapping(v)):
+                _deep_merge(existing, v)
+                continue
+        dct[k] = v
     return dct
 
 
+_ATOMIC_TYPES = (bool, int, float, str, type(None))
+
+
+def deep_copy(d, memo=None):
+    """Deep-copy a nested dictionary.
+
+    This is equivalent to ``copy.deepcopy(d)`` but handles the nested
+    dictionaries and scalar values that make up most schemas and
+    configs without going through ``copy.deepcopy``'s dispatch. Other
+    values are copied with ``copy.deepcopy``, sharing its memo, so
+    values referenced more than once are still copied once.
+    """
+    if type(d) is not dict:  # pylint: disable=unidiomatic-typecheck
+        return copy.deepcopy(d, memo)
+    if memo is None:
+        memo = {}
+    copied = {}
+    memo[id(d)] = copied
+    for key, value in d.items():
+        if isinstance(value, _ATOMIC_TYPES):
+            copied[key] = value
+        elif id(value) in memo:
+            copied[key] = memo[id(value)]
+        else:
+            copied[key] = deep_copy(value, memo)
+    return copied
+
+
 def deep_copy_internal(d):
     if not isinstance(d, dict):
         return d
     return {
-        key: deep_copy_internal(val)
+        key: deep_copy_internal(val) if isinstance(val, dict) else val
         for key, val in d.items()
     }
 
@@ -197,11 +280,10 @@ def flatten_port_dicts(dicts):
     Return:
         dict: flattened dictionary with {'state_id_port_id': value}
     """
-    merge = {}
-    for port, states_dict in dicts.items():
-        for state, value in states_dict.items():
-            merge.update({state + '_' + port: value})
-    return merge
+    return {
+        f'{state}_{port}': value
+        for port, states_dict in dicts.items()
+        for state, value in states_dict.items()}
 
 
 def tuplify_port_dicts(dicts):
@@ -212,12 +294,10 @@ def tuplify_port_dicts(dicts):
     Return:
         dict: tuplified dictionary with {(port_id','state_id'): value}
     """
-    merge = {}
-    for port, states_dict in dicts.items():
-        if states_dict:
-            for state, value in states_dict.items():
-                merge.update({(port, state): value})
-    return merge
+    return {
+        (port, state): value
+        for port, states_dict in dicts.items() if states_dict
+        for state, value in states_dict.items()}
 
 
 def flatten_timeseries(timeseries):
@@ -228,8 +308,7 @@ def flatten_timeseries(timeseries):
             flat[port] = timeseries[port]
             continue
         for variable_name, values in store_dict.items():
-            key = "{}_{}".format(port, variable_name)
-            flat[key] = values
+            flat[f'{port}_{variable_name}'] = values
     return flat
 
 
@@ -237,9 +316,24 @@ def tuple_to_str_keys(dictionary):
     """
     take a dict with tuple keys, and convert them to strings with tuple_separator as a delimiter
     """
-    new_dict = copy.deepcopy(dictionary)
-    make_str_dict(new_dict)
-    return new_dict
+    return _str_keys(dictionary)
+
+
+def _str_keys(value):
+    """Build a copy of ``value`` converted like :py:func:`make_str_dict`
+    in a single pass, sharing the values that are not converted."""
+    if isinstance(value, dict):
+        return {
+            (tuple_separator.join(key) if isinstance(key, tuple) else key):
+            _str_keys(val)
+            for key, val in value.items()}
+    if isinstance(value, list):
+        return [
+            tuple_separator.join(var) if isinstance(var, tuple)
+            else _str_keys(var) if isinstance(var, dict)
+            else var
+            for var in value]
+    return value
 
 
 def make_str_dict(dictionary):
@@ -299,6 +393,13 @@ def keys_list(d: dict) -> list:
     return list(d.keys())
 
 
+@functools.lru_cache(maxsize=256)
+def _unit_string(value_units):
+    """Get the string for ``value_units`` used in timeseries keys.
+    ``str()`` formats the units from scratch on every call."""
+    return str(value_units)
+
+
 def value_in_embedded_dict(
         data: dict,
         timeseries: Optional[dict] = None,
@@ -307,70 +408,68 @@ def value_in_embedded_dict(
     converts data from a single time step into an embedded dictionary with lists
     of values.
     If the value has a unit, saves under a key with (key, unit_string).
+    The lists hold the values from ``data`` themselves (or their magnitudes),
+    not copies, so building a timeseries adds one list slot per value.
     """
     # TODO(jerry): ^^^ Explain this further. Note that this function modifies
     #  timeseries.
     # TODO(jerry): Refine the type declarations.
-    # TODO(jerry): Use dictionary.setdefault(key, default) to simplify.
     timeseries = timeseries or {}
 
     for key, value in data.items():
         if isinstance(value, dict):
-            if key not in timeseries:
-                timeseries[key] = {}
-            timeseries[key] = value_in_embedded_dict(value, timeseries[key], time_index)
+            timeseries[key] = value_in_embedded_dict(
+                value, timeseries.get(key), time_index)
         elif time_index is None:
             if isinstance(value, Quantity):
-                unit_key = (key, str(value.units))
-                if unit_key not in timeseries:
-                    timeseries[unit_key] = []
-                timeseries[unit_key].append(value.magnitude)
+                key = (key, _unit_string(value.units))
+                value = value.magnitude
+            series = timeseries.get(key)
+            if series is None:
+                timeseries[key] = [value]
             else:
-                if key not in timeseries:
-                    timeseries[key] = []
-                timeseries[key].append(value)
+                series.append(value)
         else:
-            if key not in timeseries:
-                timeseries[key] = {
+            series = timeseries.get(key)
+            if series is None:
+                series = timeseries[key] = {
                     'value': [],
                     'time_index': []
                 }
-            timeseries[key]['value'].append(value)
-            timeseries[key]['time_index'].append(time_index)
+            series['value'].append(value)
+            series['time_index'].append(time_index)
 
     return timeseries
 
 
-def get_path_list_from_dict(dictionary):
-    paths_list = []
+def _leaf_items(dictionary, prefix, items):
+    """Append ``(path, value)`` for each leaf below ``dictionary``, whose
+    path is ``prefix``, to ``items``."""
     for key, value in dictionary.items():
+        path = prefix + (key,)
         if isinstance(value, dict):
-            subpaths = get_path_list_from_dict(value)
-            for subpath in subpaths:
-                path = (key,) + subpath
-                paths_list.append(path)
+            _leaf_items(value, path, items)
         else:
-            path = (key,)
-            paths_list.append(path)
-    return paths_list
+            items.append((path, value))
+    return items
+
+
+def get_path_list_from_dict(dictionary):
+    return [path for path, _ in _leaf_items(dictionary, (), [])]
 
 
 def get_value_from_path(dictionary, path):
-    # noinspection PyBroadException
-    try:
-        return reduce(operator.getitem, path, dictionary)
-    except Exception:
-        traceback.print_exc()
-        return None
+    value = dictionary
+    for key in path:
+        value = value[key]
+    return value
 
 
 def make_path_dict(embedded_dict):
     """ converts embedded_dict to a flat dict with path names as keys """
-    path_dict = {}
-    paths_list = get_path_list_from_dict(embedded_dict)
-    for path in paths_list:
-        path_dict[path] = get_value_from_path(embedded_dict, path)
-    return path_dict
+    # collect the values while finding the paths rather than walking
+    # down to each path again
+    return dict(_leaf_items(embedded_dict, (), []))
 
 
 def apply_func_to_leaves(root: Any, func: Callable[[Any], None]) -> None:
@@ -386,7 +485,10 @@ def apply_func_to_leaves(root: Any, func: Callable[[Any], None]) -> None:
         func(root)
         return
     for child in root.values():
-        apply_func_to_leaves(child, func)
+        if isinstance(child, dict):
+            apply_func_to_leaves(child, func)
+        else:
+            func(child)
 
 
 def test_deep_copy_internal():
@@ -397,3 +499,85 @@ def test_deep_copy_internal():
     assert copy is not d
     assert copy[1] is not d[1]
     assert copy[1][2] is d[1][2]
+
+
+def test_deep_copy():
+    shared = [1, 2]
+    schema = {
+        'port': {
+            'a': {'_default': [[0, 0]], '_emit': True},
+            'b': {'_default': shared, '_divider': 'set'},
+            'c': {'_default': shared}}}
+    copied = deep_copy(schema)
+    assert copied['port']['a'] == schema['port']['a']
+    assert copied['port']['a']['_default'][0] is not \
+        schema['port']['a']['_default'][0]
+    assert copied['port']['b']['_default'] == shared
+    assert copied['port']['b']['_default'] is not shared
+    # shared values stay shared, as with copy.deepcopy
+    assert copied['port']['b']['_default'] is copied['port']['c']['_default']
+    assert copied['port']['b']['_divider'] == 'set'
+
+
+def test_value_in_embedded_dict():
+    timeseries = None
+    for t in range(3):
+        timeseries = value_in_embedded_dict(
+            {'a': t, 'b': {'c': t * units.fg, 'd': t * units.mM}},
+            timeseries)
+    assert timeseries == {'a': [0, 1, 2], 'b': {
+        ('c', 'femtogram'): [0, 1, 2],
+        ('d', 'millimolar'): [0, 1, 2]}}
+
+
+def test_make_path_dict():
+    embedded = {'a': {'b': 1, 'c': {'d': [2]}}, 'e': 3, 'f': {}}
+    assert make_path_dict(embedded) == {
+        ('a', 'b'): 1, ('a', 'c', 'd'): [2], ('e',): 3}
+    assert get_path_list_from_dict(embedded) == [
+        ('a', 'b'), ('a', 'c', 'd'), ('e',)]
+
+
+def test_tuple_to_str_keys():
+    array = np.zeros(3)
+    d = {('a', 'b'): {'c': [('d', 'e'), {('f', 'g'): 1}], 'h': array}}
+    converted = tuple_to_str_keys(d)
+    assert converted == {
+        'a___b': {'c': ['d___e', {'f___g': 1}], 'h': array}}
+    assert converted['a___b']['h'] is array
+    # the original is left unchanged
+    assert d == {('a', 'b'): {'c': [('d', 'e'), {('f', 'g'): 1}], 'h': array}}
+
+
+def test_deep_compare():
+    shared = {'_default': np.array([np.nan])}
+    # the same objects are equal even if their values are not ==
+    assert deep_compare({'a': shared}, {'a': shared})
+    assert deep_compare({'a': {'b': np.ones(2)}}, {'a': {'b': np.ones(2)}})
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        assert not deep_compare({'a': 1}, {'b': 1})
+        assert not deep_compare({'a': {'b': 1}}, {'a': {'b': 2}})
+
+
+def test_flatten_port_dicts():
+    states = {'external': {'glc': 1.0}, 'internal': {'glc': 2.0, 'atp': 3}}
+    assert flatten_port_dicts(states) == {
+        'glc_external': 1.0, 'glc_internal': 2.0, 'atp_internal': 3}
+    assert tuplify_port_dicts(dict(states, empty=None)) == {
+        ('external', 'glc'): 1.0,
+        ('internal', 'glc'): 2.0,
+        ('internal', 'atp'): 3}
+    timeseries = {'external': {'glc': [1.0, 1.5]}, 'time': [0, 1]}
+    assert flatten_timeseries(timeseries) == {
+        'external_glc': [1.0, 1.5], 'time': [0, 1]}
+
+
+def test_remove_multi_update():
+    merged = deep_merge_multi_update(
+        {'a': 1, 'b': {'c': 2}, 'd': 5}, {'a': 3, 'b': {'c': 4}})
+    assert merged == {
+        'a': {MULTI_UPDATE_KEY: [1, 3]},
+        'b': {'c': {MULTI_UPDATE_KEY: [2, 4]}},
+        'd': 5}
+    assert remove_multi_update(merged) == {'a': 1, 'b': {'c': 2}, 'd': 5}
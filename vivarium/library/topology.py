@@ -5,6 +5,7 @@ Topology Utilities
 '''
 
 import copy
+import functools
 import re
 
 from vivarium.library.dict_utils import deep_merge, deep_merge_multi_update
@@ -98,6 +99,22 @@ def update_in(d, path, f):
     return f(d)
 
 
+def _update_in_place(d, path, f):
+    '''Like :py:func:`update_in`, but modify ``d`` instead of copying it.
+
+    Only use this on dictionaries the caller owns, like the update being
+    assembled by :py:func:`inverse_topology`.
+    '''
+    if not path:
+        return f(d)
+    node = d
+    for head in path[:-1]:
+        node = node.setdefault(head, {})
+    last = path[-1]
+    node[last] = f(node.setdefault(last, {}))
+    return d
+
+
 def paths_to_dict(path_list, f=lambda x: x):
     '''Create a new dictionary that has the paths in ``path_list``.
 
@@ -175,7 +192,7 @@ def inverse_topology(outer, update, topology, inverse=None, multi_updates=True):
                 for child, child_update in update.items():
                     inner = normalize_path(outer + path + (child,))
                     if isinstance(child_update, dict):
-                        inverse = update_in(
+                        inverse = _update_in_place(
                             inverse,
                             inner,
                             lambda current: deep_merge(
@@ -206,13 +223,13 @@ def inverse_topology(outer, update, topology, inverse=None, multi_updates=True):
                 inner = normalize_path(outer + path)
                 if isinstance(value, dict):
                     if multi_updates:
-                        inverse = update_in(
+                        inverse = _update_in_place(
                             inverse,
                             inner,
                             lambda current: deep_merge_multi_update(current, value))
                     # Do not allow multiupdates when forming initial state
                     else:
-                        inverse = update_in(
+                        inverse = _update_in_place(
                             inverse,
                             inner,
                             lambda current: deep_merge(current, value))
@@ -222,7 +239,32 @@ def inverse_topology(outer, update, topology, inverse=None, multi_updates=True):
 
 
 def normalize_path(path):
-    """Make a path absolute by resolving ``..`` elements."""
+    """Make a path absolute by resolving ``..`` elements.
+
+    Results for tuple paths are cached, so the same path tuples -- which
+    topologies produce on every timestep -- are only resolved once and
+    share a single normalized tuple instance.
+    """
+    if isinstance(path, tuple):
+        try:
+            return _normalize_tuple_path(
+                path, tuple(map(type, path)))
+        except TypeError:
+            # path has unhashable elements
+            pass
+    return _normalize_path(path)
+
+
+@functools.lru_cache(maxsize=4096, typed=True)
+def _normalize_tuple_path(path, step_types):
+    # step_types is only part of the cache key, so that paths which
+    # compare equal but hold different types, like (1,) and (True,),
+    # are cached apart
+    del step_types
+    return _normalize_path(path)
+
+
+def _normalize_path(path):
     progress = []
     for step in path:
         if step == '..' and len(progress) > 0:
@@ -412,6 +454,28 @@ def test_in():
     blank = update_in(blank, path, lambda x: x + 6)
     print(blank)
 
+
+def test_update_in_place():
+    d = {'a': {'b': {'c': 1}}}
+    inner = d['a']
+    assert _update_in_place(d, ('a', 'b'), lambda x: deep_merge(
+        x, {'d': 2})) is d
+    assert d['a'] is inner
+    assert d == {'a': {'b': {'c': 1, 'd': 2}}}
+    assert _update_in_place(d, ('e', 'f'), lambda x: 3) == {
+        'a': {'b': {'c': 1, 'd': 2}}, 'e': {'f': 3}}
+
+
+def test_normalize_path():
+    assert normalize_path(('a', 'b', '..', 'c')) == ('a', 'c')
+    assert normalize_path(['..', 'a']) == ('..', 'a')
+    assert normalize_path(('a', 'b')) is normalize_path(('a', 'b'))
+    # paths that compare equal keep their own element types
+    assert normalize_path((1, 'a')) == (1, 'a')
+    assert type(normalize_path((True, 'a'))[0]) is bool
+    assert type(normalize_path((1.0, 'a'))[0]) is float
+
+
 def test_path_declare():
 
     path_down = 'path>to>store'
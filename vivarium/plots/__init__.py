@@ -0,0 +1,27 @@
+"""
+=====
+Plots
+=====
+
+Plotting functions for simulation output.
+"""
+
+from typing import Callable, TypeVar
+
+
+PlotFunction = TypeVar('PlotFunction', bound=Callable)
+
+
+def pure_plot(plot: PlotFunction) -> PlotFunction:
+    """Mark ``plot`` as a plot function that never modifies its data
+
+    :py:class:`vivarium.core.control.Control` passes data straight to
+    pure plots, even when asked to copy it.
+    """
+    setattr(plot, '_vivarium_pure', True)
+    return plot
+
+
+def is_pure_plot(plot: Callable) -> bool:
+    """Check whether ``plot`` was marked with :py:func:`pure_plot`"""
+    return getattr(plot, '_vivarium_pure', False)
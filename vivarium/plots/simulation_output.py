@@ -11,6 +11,7 @@ import random
 import numpy as np
 import matplotlib.pyplot as plt
 
+from vivarium.plots import pure_plot
 from vivarium.core.emitter import path_timeseries_from_embedded_timeseries
 from vivarium.library.dict_utils import get_value_from_path
 
@@ -67,6 +68,7 @@ def _save_fig_to_dir(
     fig.savefig(fig_path, bbox_inches='tight')
 
 
+@pure_plot
 def plot_simulation_output(
         timeseries_raw,
         settings: Optional[Dict[str, Any]] = None,
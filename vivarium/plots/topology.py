@@ -73,12 +73,15 @@ def get_bigraph(composite):
     process_nodes = ['\n'.join(process_path[0]) for process_path in process_paths]
     store_paths = hierarchy_object.depth(filter_function=lambda x: x.inner != {})
     store_nodes = ['\n'.join(store_path[0]) for store_path in store_paths if store_path[0] != tuple()]
+    # sets for membership checks, alongside the ordered node lists
+    process_node_set = set(process_nodes)
+    store_node_set = set(store_nodes)
 
     # get the edges between processes and stores
     edges = {}
     for (process_path, process) in process_paths:
         process_id = '\n'.join(process_path)
-        assert process_id in process_nodes, (
+        assert process_id in process_node_set, (
             f"{process_id} process id is not in process_nodes list: {process_nodes}")
 
         process_topology = process.topology
@@ -91,10 +94,11 @@ def get_bigraph(composite):
 
             store_path = normalize_path(process_path[:-1] + store_path)
             store_id = '\n'.join(store_path)
-            if store_id not in store_nodes:
+            if store_id not in store_node_set:
                 # print(f"Adding {store_id} to store_nodes list {store_nodes}")
                 store_paths.append((store_path, hierarchy_object.get_path(path=store_path)))
                 store_nodes.append(store_id)
+                store_node_set.add(store_id)
 
             # save the edge
             edge = (process_id, store_id)
@@ -113,7 +117,7 @@ def get_bigraph(composite):
                 place_edges.append(place_edge)
 
     # are there overlapping names?
-    overlap = [name for name in process_nodes if name in store_nodes]
+    overlap = [name for name in process_nodes if name in store_node_set]
     if overlap:
         print('{} shared by processes and stores'.format(overlap))
 
@@ -146,6 +150,7 @@ def get_bigraph(composite):
 def remove(
         remove_nodes, node_list=None, node_dict=None, edge_list=None, edge_dict=None):
     """remove specified nodes"""
+    remove_nodes = set(remove_nodes)
     if node_list:
         return [
             node_id for node_id in node_list
@@ -279,10 +284,11 @@ def graph_figure(
             graph_format)
         pos = deep_merge(pos, pos_format)
     if coordinates:
+        graph_nodes = set(process_nodes).union(store_nodes)
         pos_format = {
             node: np.array(coord)
             for node, coord in coordinates.items()
-            if node in process_nodes + store_nodes}
+            if node in graph_nodes}
         pos = deep_merge(pos, pos_format)
 
     # initialize figure based on positions, nodes, and buffer
@@ -337,9 +343,11 @@ def graph_figure(
     # edge colors
     if color_edges:
         edge_args['edge_cmap'] = plt.get_cmap('nipy_spectral')
-        edge_args['edge_color'] = list(range(1, len(edges) + 1))
+        edge_color = np.arange(1, len(edges) + 1)
         if graph_format == 'hierarchy':
-            edge_args['edge_color'].extend([0 for _ in place_edges])
+            edge_color = np.concatenate(
+                [edge_color, np.zeros(len(place_edges), dtype=int)])
+        edge_args['edge_color'] = edge_color
 
     # edge width
     edge_args['width'] = [edge_width for _ in edges.keys()]
@@ -16,7 +16,6 @@ import os
 from vivarium.core.directories import TEST_OUT_DIR
 from vivarium.core.engine import Engine
 from vivarium.library.timeseries import save_timeseries
-from vivarium.plots.simulation_output import plot_simulation_output
 from vivarium.core.process import Process
 
 NAME = 'injector'
@@ -95,6 +94,8 @@ def test_injector():
 
 
 def main():
+    from vivarium.plots.simulation_output import (  # pylint: disable=import-outside-toplevel
+        plot_simulation_output)
     out_dir = os.path.join(TEST_OUT_DIR, NAME)
     os.makedirs(out_dir, exist_ok=True)
     timeseries = run_injector()
@@ -24,6 +24,9 @@ class CountsToConcentration(Deriver):
             except ValueError:
                 print(
                     f"{mol_id} needs a mw convertable to units.g / units.mol")
+        # conversion factors from count / volume magnitudes to the
+        # concentration unit, keyed by (mol_id, volume units)
+        self._scales = {}
 
     def initial_state(self, config=None):
         return self.default_state()
@@ -55,11 +58,20 @@ class CountsToConcentration(Deriver):
         # do conversion
         # Concentration = mass/molecular_weight/characteristic volume
         # Note: here we just set the scale, not the volume
-        mass_species_conc = {
-            mol_id: (count * units.molec * self.parameters[
-                'molecular_weights'][mol_id] / volume).to(
-                self.parameters['concentration_unit'])
-            for mol_id, count in counts.items()}
+        concentration_unit = self.parameters['concentration_unit']
+        volume_units = volume.units
+        volume_magnitude = volume.magnitude
+        mass_species_conc = {}
+        for mol_id, count in counts.items():
+            key = (mol_id, volume_units)
+            scale = self._scales.get(key)
+            if scale is None:
+                mw = self.parameters['molecular_weights'][mol_id]
+                scale = self._scales[key] = (
+                    units.molec * mw / volume_units).to(
+                    concentration_unit).magnitude
+            mass_species_conc[mol_id] = units.Quantity(
+                count / volume_magnitude * scale, concentration_unit)
 
         return {'output': mass_species_conc}
 
@@ -84,6 +96,9 @@ class MassToCount(Deriver):
             except ValueError:
                 print(
                     f"{mol_id} needs a mw convertable to units.g / units.mol")
+        self._mw_magnitudes = {
+            mol_id: getattr(mw, 'magnitude', mw)
+            for mol_id, mw in self.parameters['molecular_weights'].items()}
 
     def initial_state(self, config=None):
         return self.default_state()
@@ -113,9 +128,12 @@ class MassToCount(Deriver):
         # do conversion
         # count = mass/molecular_weight
         # Note: here we just set the scale, not the volume
+        # Dividing quantities does not convert their units, so this is
+        # the magnitude of mass / molecular_weight.
         mass_species_count = {
-            mol_id: int((mass / self.parameters[
-                'molecular_weights'][mol_id]).magnitude)
+            mol_id: int(
+                getattr(mass, 'magnitude', mass)
+                / self._mw_magnitudes[mol_id])
             for mol_id, mass in masses.items()}
 
         return {'output': mass_species_count}
@@ -145,6 +163,9 @@ class MassToMolar(Deriver):
             except ValueError:
                 print(
                     f"{mol_id} needs a mw convertable to units.g / units.mol")
+        # conversion factors from mass / volume magnitudes to the
+        # concentration unit, keyed by (mol_id, mass units, volume units)
+        self._scales = {}
 
     def initial_state(self, config=None):
         return self.default_state()
@@ -176,10 +197,21 @@ class MassToMolar(Deriver):
         # do conversion
         # Concentration = mass/molecular_weight/characteristic volume
         # Note: here we just set the scale, not the volume
-        mass_species_conc = {
-            mol_id: (mass / self.parameters['molecular_weights'][mol_id] /
-                     volume).to(self.parameters['concentration_unit'])
-            for mol_id, mass in masses.items()}
+        concentration_unit = self.parameters['concentration_unit']
+        volume_units = volume.units
+        volume_magnitude = volume.magnitude
+        mass_species_conc = {}
+        for mol_id, mass in masses.items():
+            key = (mol_id, mass.units, volume_units)
+            scale = self._scales.get(key)
+            if scale is None:
+                mw = self.parameters['molecular_weights'][mol_id]
+                scale = self._scales[key] = (
+                    mass.units / mw / volume_units).to(
+                    concentration_unit).magnitude
+            mass_species_conc[mol_id] = units.Quantity(
+                mass.magnitude / volume_magnitude * scale,
+                concentration_unit)
 
         return {'output': mass_species_conc}
 
@@ -208,10 +240,27 @@ def test_derivers():
     mass_in['input'] = {'A': 10, 'B': 10}
     concs_out = m_to_conc.next_update(0, mass_in)
 
+    # MassToMolar
+    m_to_molar = MassToMolar(config)
+    mass_in = m_to_molar.initial_state()
+    mass_in['input'] = {'A': 10 * units.fg, 'B': 10 * units.fg}
+    molar_out = m_to_molar.next_update(0, mass_in)
+
     # asserts
     assert counts_out == {'output': {'A': 10, 'B': 5}}
-    # TODO assert concs_out
-    _ = concs_out
+    volume = 1 * units.fL
+    for mol_id, mw in config['molecular_weights'].items():
+        expected_conc = (10 * units.molec * mw / volume).to(
+            units.mg / units.mL)
+        assert concs_out['output'][mol_id].units == expected_conc.units
+        assert abs(
+            concs_out['output'][mol_id] - expected_conc
+        ).magnitude <= 1e-12 * expected_conc.magnitude
+        expected_molar = (10 * units.fg / mw / volume).to(units.mmolar)
+        assert molar_out['output'][mol_id].units == expected_molar.units
+        assert abs(
+            molar_out['output'][mol_id] - expected_molar
+        ).magnitude <= 1e-12 * expected_molar.magnitude
 
 if __name__ == '__main__':
     test_derivers()
@@ -13,7 +13,6 @@ from vivarium.core.process import (
 from vivarium.core.composer import Composer
 from vivarium.core.directories import PROCESS_OUT_DIR
 from vivarium.core.engine import Engine
-from vivarium.plots.simulation_output import plot_simulation_output
 from vivarium.composites.toys import ExchangeA
 from vivarium.processes.timeline import TimelineProcess
 
@@ -180,6 +179,8 @@ def test_death(return_value=False):
 
 
 def run_death():
+    from vivarium.plots.simulation_output import (  # pylint: disable=import-outside-toplevel
+        plot_simulation_output)
     out_dir = os.path.join(PROCESS_OUT_DIR, NAME)
     os.makedirs(out_dir, exist_ok=True)
     output = test_death(return_value=True)